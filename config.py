@@ -8,7 +8,9 @@ vehicle_env = {
     "max_len": 30,  # max road segment length
     "min_angle": 10,  # min road segment angle of rotation in degrees
     "max_angle": 80,  # max road angle of rotation in degrees
-    "lane_width": 10
+    "lane_width": 10,
+    "max_steps": 1000,  # max number of steps of the simulation of a road
+    "stop_deviation": None  # stop the simulation once the deviation from the road exceeds this value, None to disable
 }
 
 
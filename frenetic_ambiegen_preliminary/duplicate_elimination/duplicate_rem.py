@@ -1,20 +1,165 @@
 import logging as log
+import numpy as np
 from pymoo.core.duplicate import ElementwiseDuplicateElimination
 
+from ambiegen.solutions.genome import novelty_matrix, pair_novelty, stack_genomes
+
 # It's a duplicate elimination that compares the states of the two elements
 
+# number of consecutive actions used as a bucket key
+SEGMENT_SIZE = 4
+
+
+def segment_keys(block, lengths):
+    """
+    It computes the bucket keys of the test cases of a block. Every complete segment of SEGMENT_SIZE states
+    gives one key, made of the position of the segment and the actions of its states.
+
+    Args:
+      block: the states of the test cases, as an array of shape (m, capacity, 3)
+      lengths: the number of states of every test case
+
+    Returns:
+      An array with the index of the test case of every key, and an array with the keys.
+    """
+    n_segments = block.shape[1] // SEGMENT_SIZE
+    actions = block[:, :n_segments * SEGMENT_SIZE, 0].astype(np.int64)
+    actions = actions.reshape(len(block), n_segments, SEGMENT_SIZE)
+    keys = (actions * 3 ** np.arange(SEGMENT_SIZE)).sum(axis=2) + np.arange(n_segments) * 3 ** SEGMENT_SIZE
+    ids, segments = np.nonzero(np.arange(n_segments) < (np.asarray(lengths) // SEGMENT_SIZE)[:, None])
+    return ids, keys[ids, segments]
+
+
+def is_short(lengths, threshold):
+    """
+    Two test cases with a novelty below the threshold have more than a fraction s = 1 - threshold of the
+    union of their states in common, so less than m * (1 - s) / (1 + s) of the first m states, m being the
+    length of the shorter one, differ. If there are more complete segments than differing states, at least
+    one segment has the same actions in both test cases and they share a bucket key.
+
+    Returns:
+      True for the test cases too short to be sure to share a key with their duplicates.
+    """
+    lengths = np.asarray(lengths)
+    similarity = 1 - threshold
+    return lengths // SEGMENT_SIZE < lengths * (1 - similarity) / (1 + similarity) + 1e-9
+
+
+def candidate_pairs(lengths_a, keys_a, lengths_b, keys_b, threshold):
+    """
+    It finds the pairs of test cases that can have a novelty below the threshold: the pairs that share a
+    bucket key, or where the shorter test case is too short to have keys, and whose lengths are close
+    enough for the novelty to be below the threshold.
+
+    Returns:
+      The arrays with the index in the first block and the index in the second block of every pair.
+    """
+    ids_a, codes_a = keys_a
+    ids_b, codes_b = keys_b
+    order = np.argsort(codes_b, kind="stable")
+    ids_b, codes_b = ids_b[order], codes_b[order]
+    low = np.searchsorted(codes_b, codes_a, "left")
+    counts = np.searchsorted(codes_b, codes_a, "right") - low
+    positions = np.arange(counts.sum()) + np.repeat(low - np.cumsum(counts) + counts, counts)
+    rows = [np.repeat(ids_a, counts)]
+    cols = [ids_b[positions]]
+
+    all_a = np.arange(len(lengths_a))
+    all_b = np.arange(len(lengths_b))
+    for i in np.flatnonzero(is_short(lengths_a, threshold)):
+        rows.append(np.full(len(all_b), i))
+        cols.append(all_b)
+    for j in np.flatnonzero(is_short(lengths_b, threshold)):
+        rows.append(all_a)
+        cols.append(np.full(len(all_a), j))
+
+    pairs = np.unique(np.concatenate(rows) * len(lengths_b) + np.concatenate(cols))
+    rows, cols = np.divmod(pairs, len(lengths_b))
+
+    # the intersection is at most the shorter length, so the novelty can be below the threshold
+    # only if the shorter test case is longer than (1 - threshold) times the longer one
+    shorter = np.minimum(lengths_a[rows], lengths_b[cols])
+    longer = np.maximum(lengths_a[rows], lengths_b[cols])
+    close = shorter > (1 - threshold) * longer - 1e-9
+    return rows[close], cols[close]
+
+
+def find_duplicates(block_a, lengths_a, block_b=None, lengths_b=None, threshold=0.2):
+    """
+    It finds the test cases of the first block that have a novelty below the threshold to a test case of
+    the second block, or to a later test case of the same block. The test cases are bucketed by their
+    segment keys, and the exact novelty is computed only for the pairs of test cases in the same bucket,
+    which gives the same result as comparing all the pairs.
+
+    Returns:
+      A boolean array with True for the duplicates of the first block, and the indices of the pairs found.
+    """
+    lengths_a = np.asarray(lengths_a)
+    keys_a = segment_keys(block_a, lengths_a)
+    if block_b is None:
+        block_b, lengths_b, keys_b = block_a, lengths_a, keys_a
+    else:
+        lengths_b = np.asarray(lengths_b)
+        keys_b = segment_keys(block_b, lengths_b)
+
+    rows, cols = candidate_pairs(lengths_a, keys_a, lengths_b, keys_b, threshold)
+    if block_b is block_a:
+        later = rows < cols
+        rows, cols = rows[later], cols[later]
+
+    similar = pair_novelty(block_a, lengths_a, block_b, lengths_b, rows, cols) < threshold
+    is_duplicate = np.zeros(len(block_a), dtype=bool)
+    is_duplicate[rows[similar]] = True
+    return is_duplicate, (rows[similar], cols[similar])
+
 
 class DuplicateElimination(ElementwiseDuplicateElimination):
     '''
     A class to eliminate duplicates in the population.
+    Two individuals are duplicates if the novelty of their states is below 0.2.
+    For large populations, the individuals are first bucketed, and only the individuals in the same bucket
+    are compared.
     '''
 
+    def __init__(self, threshold=0.2, max_matrix_size=2500, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+        self.max_matrix_size = max_matrix_size
+
     def is_equal(self, a, b):
         state1 = a.X[0].states
         state2 = b.X[0].states
 
         # Calculating the novelty of the two states.
         novelty = abs(a.X[0].calculate_novelty(state1, state2))
-        if novelty  < 0.2:
+        if novelty  < self.threshold:
             log.debug("Duplicate %s and %s found", a.X[0], b.X[0])
-        return novelty < 0.2
+        return novelty < self.threshold
+
+    def _do(self, pop, other, is_duplicate):
+        """
+        Same as the pairwise comparison of ElementwiseDuplicateElimination. The novelty of the pairs is
+        read from one novelty matrix of the stacked states, or, when the matrix would have more than
+        max_matrix_size elements, computed only for the pairs of individuals in the same bucket.
+        """
+        block, lengths = stack_genomes([x[0].states for x in pop.get("X")])
+        candidates = pop if other is None else other
+        other_block = None if other is None else stack_genomes([x[0].states for x in other.get("X")])
+
+        if len(pop) * len(candidates) > self.max_matrix_size:
+            _, (rows, cols) = find_duplicates(
+                block, lengths, *(other_block or (None, None)), threshold=self.threshold
+            )
+        else:
+            matrix = novelty_matrix(block, lengths, *(other_block or (None, None)))
+            if other is None:
+                # as in the pairwise comparison, the population is compared to itself only with the next individuals
+                matrix[np.tril_indices(len(matrix))] = np.inf
+            rows, cols = np.nonzero(matrix < self.threshold)
+
+        for i, j in zip(rows, cols):
+            if not is_duplicate[i]:
+                log.debug("Duplicate %s and %s found", pop[i].X[0], candidates[j].X[0])
+                is_duplicate[i] = True
+
+        return is_duplicate
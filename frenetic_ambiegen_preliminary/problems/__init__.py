@@ -1,4 +1,5 @@
 from ambiegen.problems.vehicle_problem import VehicleProblem1Obj, VehicleProblem2Obj
+from ambiegen.problems.vehicle_problem import VehicleBatchProblem1Obj, VehicleBatchProblem2Obj
 
 
 PROBLEMS = {
@@ -6,3 +7,9 @@ PROBLEMS = {
     "vehicle_nsga2": VehicleProblem2Obj,
     "vehicle_random": VehicleProblem1Obj,
 }
+
+BATCH_PROBLEMS = {
+    "vehicle_ga": VehicleBatchProblem1Obj,
+    "vehicle_nsga2": VehicleBatchProblem2Obj,
+    "vehicle_random": VehicleBatchProblem1Obj,
+}
@@ -1,5 +1,9 @@
 import logging as log
-from pymoo.core.problem import ElementwiseProblem
+import numpy as np
+from pymoo.core.problem import ElementwiseProblem, Problem
+
+from ambiegen.solutions import VehicleSolution
+from ambiegen.utils.calc_novelty import calc_population_novelty, calc_population_novelties, get_best_scenarios
 
 
 class VehicleProblem1Obj(ElementwiseProblem):
@@ -7,8 +11,8 @@ class VehicleProblem1Obj(ElementwiseProblem):
     Module to calculate the fitness of the individuals
     '''
 
-    def __init__(self):
-        super().__init__(n_var=1, n_obj=1, n_ieq_constr=1)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=1, n_obj=1, n_ieq_constr=1, **kwargs)
 
     def _evaluate(self, x, out, *args, **kwargs):
         """
@@ -20,19 +24,28 @@ class VehicleProblem1Obj(ElementwiseProblem):
         """
         s = x[0]
         s.fitness = s.eval_fitness()
-        out["F"] = s.fitness
-        out["G"] = 5 - s.fitness * (-1)
+        self.fill_out(s, out)
 
         log.debug("Evaluated individual %s, fitness %s", s, s.fitness)
 
+    def fill_out(self, s, out):
+        """
+        It fills the output dictionary from an evaluated individual
+
+        :param s: the evaluated individual
+        :param out: the fitness of the individual as well as the constraint
+        """
+        out["F"] = s.fitness
+        out["G"] = 5 - s.fitness * (-1)
+
 
 class VehicleProblem2Obj(ElementwiseProblem):
     '''
     Module to calculate the fitnes of the individuals
     '''
 
-    def __init__(self):
-        super().__init__(n_var=1, n_obj=2, n_ieq_constr=1)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=1, n_obj=2, n_ieq_constr=1, **kwargs)
 
     def _evaluate(self, x, out, *args, **kwargs):
         """
@@ -44,23 +57,69 @@ class VehicleProblem2Obj(ElementwiseProblem):
         """
         s = x[0]
         s.fitness = s.eval_fitness()
-        algorithm = kwargs["algorithm"]
-
-        solutions = algorithm.pop.get("X")
-        if (solutions.size > 0) and (s.fitness < -1):
-            top_solutions = solutions[0:5]
-            best_scenarios = [top_solutions[i]
-                              [0].states for i in range(len(top_solutions))]
-
-            novelty_list = []
-            for i in range(len(best_scenarios)):
-                nov = s.calculate_novelty(best_scenarios[i], s.states)
-                novelty_list.append(nov)
-            s.novelty = sum(novelty_list)/len(novelty_list)
-        else:
-            s.novelty = 0
+        s.novelty = calc_population_novelty(s.states, get_best_scenarios(kwargs["algorithm"]), s.fitness)
+        self.fill_out(s, out)
+
+        log.debug("Evaluated individual %s, fitness %s, novelty %s", s, s.fitness, s.novelty)
+
+    def fill_out(self, s, out):
+        """
+        It fills the output dictionary from an evaluated individual
 
+        :param s: the evaluated individual
+        :param out: the fitness and novelty of the individual as well as the constraint
+        """
         out["F"] = [s.fitness, s.novelty]
         out["G"] =  5 - s.fitness * (-1)
 
-        log.debug("Evaluated individual %s, fitness %s, novelty %s", s, s.fitness, s.novelty)
+
+class VehicleBatchProblem1Obj(Problem):
+    '''
+    Module to calculate the fitness of the whole population at once
+    with the vectorized system model
+    '''
+
+    def __init__(self):
+        super().__init__(n_var=1, n_obj=1, n_ieq_constr=1)
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        """
+        > This function evaluates the fitness of all the individuals
+        Individuals are stored in the input matrix x
+
+        :param x: the input individuals
+        :param out: the fitness of the individuals as well as the constraint
+        """
+        fitness = np.array(VehicleSolution.eval_fitness_batch(x[:, 0]), dtype=float)
+        out["F"] = fitness
+        out["G"] = 5 - fitness * (-1)
+
+        log.debug("Evaluated %d individuals", len(x))
+
+
+class VehicleBatchProblem2Obj(Problem):
+    '''
+    Module to calculate the fitness and novelty of the whole population at once
+    with the vectorized system model
+    '''
+
+    def __init__(self):
+        super().__init__(n_var=1, n_obj=2, n_ieq_constr=1)
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        """
+        > This function evaluates the fitness and novelty of all the individuals
+        Individuals are stored in the input matrix x
+
+        :param x: the input individuals
+        :param out: the fitness and novelty of the individuals as well as the constraint
+        """
+        fitness = np.array(VehicleSolution.eval_fitness_batch(x[:, 0]), dtype=float)
+        novelty = calc_population_novelties([s.states for s in x[:, 0]], get_best_scenarios(kwargs["algorithm"]), fitness)
+        for s, n in zip(x[:, 0], novelty.tolist()):
+            s.novelty = n
+
+        out["F"] = np.column_stack([fitness, [s.novelty for s in x[:, 0]]])
+        out["G"] = 5 - fitness * (-1)
+
+        log.debug("Evaluated %d individuals", len(x))
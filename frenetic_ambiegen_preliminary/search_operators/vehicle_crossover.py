@@ -4,6 +4,7 @@ import numpy as np
 from pymoo.core.crossover import Crossover
 
 from ambiegen.solutions import VehicleSolution
+from ambiegen.solutions.genome import Genome
 
 # this is the crossover operator for the vehicle problem
 class VehicleCrossover(Crossover):
@@ -28,8 +29,8 @@ class VehicleCrossover(Crossover):
             s_a, s_b = X[0, k, 0], X[1, k, 0]
             if r < self.cross_rate:
                 log.debug("Crossover performed on individuals %s and %s", s_a, s_b)
-                tc_a = s_a.states.copy()
-                tc_b = s_b.states.copy()
+                tc_a = s_a.states.array
+                tc_b = s_b.states.array
 
                 min_len = min(len(tc_a), len(tc_b))
                 crossover_point = rm.randint(1, min_len - 1)
@@ -40,10 +41,10 @@ class VehicleCrossover(Crossover):
                     offa = VehicleSolution()
                     offb = VehicleSolution()
                     # one point crossover
-                    offa.states[:crossover_point] = tc_a[:crossover_point]
-                    offa.states[crossover_point:] = tc_b[crossover_point:]
-                    offb.states[:crossover_point] = tc_b[:crossover_point]
-                    offb.states[crossover_point:] = tc_a[crossover_point:]
+                    offa.states = Genome(np.concatenate((tc_a[:crossover_point], tc_b[crossover_point:])))
+                    offb.states = Genome(np.concatenate((tc_b[:crossover_point], tc_a[crossover_point:])))
+                    # the roads of the offspring are built starting from the prefix of their first parent
+                    offa.road_trace, offb.road_trace = s_a.road_trace, s_b.road_trace
                     
                     Y[0, k, 0], Y[1, k, 0] = offa, offb
 
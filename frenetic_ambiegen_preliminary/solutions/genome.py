@@ -0,0 +1,308 @@
+'''
+Module with the array based representation of the test cases of the vehicle problem.
+'''
+import numpy as np
+
+# every state is (action, length, angle)
+STATE_SIZE = 3
+# maximum difference of the length or angle of two states that are considered the same
+SIMILARITY_THRESHOLD = 5
+
+
+class Genome:
+    """
+    This is a class to represent the states of one test case.
+    The states are stored in an int16 array with a capacity, so that states can be appended without
+    copying the test case, and the array can also be a row of the block of a whole population.
+    Iterating over the genome, or indexing it with an integer, gives the states as tuples of ints.
+    """
+
+    __slots__ = ("data", "length")
+
+    def __init__(self, states=(), capacity=None):
+        states = np.asarray(states, dtype=np.int16).reshape(-1, STATE_SIZE)
+        self.length = len(states)
+        self.data = np.empty((max(self.length, capacity or 0), STATE_SIZE), dtype=np.int16)
+        self.data[:self.length] = states
+
+    @classmethod
+    def from_array(cls, data, length):
+        """
+        It creates a genome that uses the given array, without copying it
+
+        Args:
+          data: an int16 array of shape (capacity, 3)
+          length: the number of states in the array
+
+        Returns:
+          The genome.
+        """
+        genome = cls.__new__(cls)
+        genome.data = data
+        genome.length = int(length)
+        return genome
+
+    @property
+    def array(self):
+        """
+        Returns:
+          A view of the states as an array of shape (length, 3).
+        """
+        return self.data[:self.length]
+
+    @property
+    def capacity(self):
+        return len(self.data)
+
+    def append(self, state):
+        """
+        It adds a state at the end of the genome, the array grows by doubling its capacity when it is full
+        """
+        if self.length == len(self.data):
+            data = np.empty((max(2 * len(self.data), 8), STATE_SIZE), dtype=np.int16)
+            data[:self.length] = self.array
+            self.data = data
+        self.data[self.length] = state
+        self.length += 1
+
+    def truncate(self, length):
+        """
+        It keeps only the first length states, the capacity is not changed
+        """
+        self.length = max(0, min(length, self.length))
+
+    def copy(self):
+        return Genome(self.array)
+
+    def tolist(self):
+        """
+        Returns:
+          The states as a list of lists of ints.
+        """
+        return self.array.tolist()
+
+    def key(self):
+        """
+        Returns:
+          The bytes of the states, equal for genomes with the same states.
+        """
+        return self.array.tobytes()
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return map(tuple, self.array.tolist())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Genome(self.array[index])
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("genome index out of range")
+        return tuple(self.data[index].tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.array if dtype is None else self.array.astype(dtype)
+        return array.copy() if copy else array
+
+    def __eq__(self, other):
+        if not isinstance(other, Genome):
+            return NotImplemented
+        return self.length == other.length and np.array_equal(self.array, other.array)
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __reduce__(self):
+        # only the used part of the array is pickled
+        return Genome, (self.array,)
+
+    def __repr__(self):
+        return "Genome(%s)" % self.tolist()
+
+
+def as_array(states):
+    """
+    It returns the states of a genome, or a list of states, as an array of shape (n, 3)
+    """
+    if isinstance(states, Genome):
+        return states.array
+    return np.asarray(states).reshape(-1, STATE_SIZE)
+
+
+def similar_states(tc1, tc2):
+    """
+    It compares the states of two test cases position by position, up to the length of the shorter one.
+    Two states are similar if they have the same action and their length (for going straight)
+    or angle (for turning) differ by at most SIMILARITY_THRESHOLD.
+
+    Args:
+      tc1: the first test case
+      tc2: the second test case
+
+    Returns:
+      A boolean array with True for the similar states.
+    """
+    a = as_array(tc1)
+    b = as_array(tc2)
+    n = min(len(a), len(b))
+    a, b = a[:n], b[:n]
+    close = np.abs(a[:, 1:] - b[:, 1:]) <= SIMILARITY_THRESHOLD
+    return (a[:, 0] == b[:, 0]) & np.where(a[:, 0] == 0, close[:, 0], close[:, 1])
+
+
+def novelty(tc1, tc2):
+    """
+    The novelty of two test cases according to the Jaccard distance definition:
+    1 - intersection/(set1 size + set2 size - intersection)
+
+    Args:
+      tc1: the first test case
+      tc2: the second test case
+
+    Returns:
+      The novelty of the two test cases, between 0 and 1.
+    """
+    intersection = int(np.count_nonzero(similar_states(tc1, tc2)))
+    return 1 - intersection / (len(tc1) + len(tc2) - intersection)
+
+
+def _padded_novelty(a, b, lengths_a, lengths_b):
+    """
+    The novelty of padded test cases, for arrays of states of shape (..., n, 3) and lengths that broadcast together
+    """
+    d = np.abs(a - b)
+    value = np.where(a[..., 0] == 0, d[..., 1], d[..., 2])
+    valid = np.arange(a.shape[-2]) < np.minimum(lengths_a, lengths_b)[..., None]
+    similar = (d[..., 0] == 0) & (value <= SIMILARITY_THRESHOLD) & valid
+    intersection = np.count_nonzero(similar, axis=-1)
+    return 1 - intersection / (lengths_a + lengths_b - intersection)
+
+
+def novelty_matrix(block_a, lengths_a, block_b=None, lengths_b=None, max_elements=1 << 18):
+    """
+    The novelty of every test case of a block to every test case of another block, or of the same
+    block, computed with vectorized operations over the padded states. The rows are processed in
+    chunks of at most max_elements compared states, so the memory does not grow with the square
+    of the population. The values are the same as the ones of novelty.
+
+    Args:
+      block_a: the states of the first test cases, as an array of shape (m_a, capacity, 3)
+      lengths_a: the number of states of every test case of the first block
+      block_b: the states of the second test cases, None to compare the first block to itself
+      lengths_b: the number of states of every test case of the second block
+      max_elements: the maximum number of states compared at once
+
+    Returns:
+      An array of shape (m_a, m_b) with the novelty of every pair of test cases.
+    """
+    if block_b is None:
+        block_b, lengths_b = block_a, lengths_a
+    lengths_a = np.asarray(lengths_a)
+    lengths_b = np.asarray(lengths_b)
+    n = min(block_a.shape[1], block_b.shape[1])
+    a = block_a[:, :n]
+    b = block_b[:, :n]
+
+    matrix = np.empty((len(a), len(b)))
+    step = max(1, max_elements // max(1, len(b) * n))
+    for start in range(0, len(a), step):
+        rows = slice(start, start + step)
+        matrix[rows] = _padded_novelty(a[rows, None], b[None], lengths_a[rows, None], lengths_b[None])
+    return matrix
+
+
+def pair_novelty(block_a, lengths_a, block_b, lengths_b, rows, cols, max_elements=1 << 18):
+    """
+    The novelty of selected pairs of test cases of two blocks, the pair k being the test case rows[k]
+    of the first block and cols[k] of the second one.
+
+    Returns:
+      An array with the novelty of every pair.
+    """
+    lengths_a = np.asarray(lengths_a)
+    lengths_b = np.asarray(lengths_b)
+    n = min(block_a.shape[1], block_b.shape[1])
+
+    novelty = np.empty(len(rows))
+    step = max(1, max_elements // max(1, n))
+    for start in range(0, len(rows), step):
+        r = rows[start:start + step]
+        c = cols[start:start + step]
+        novelty[start:start + step] = _padded_novelty(block_a[r, :n], block_b[c, :n], lengths_a[r], lengths_b[c])
+    return novelty
+
+
+def block_novelty(states, block, lengths):
+    """
+    The novelty of one test case to every test case of a block, computed in one pass.
+
+    Args:
+      states: the test case
+      block: the states of the other test cases, as an array of shape (m, capacity, 3)
+      lengths: the number of states of every test case of the block
+
+    Returns:
+      An array with the m novelty values.
+    """
+    a = as_array(states)
+    return novelty_matrix(a[None], [len(a)], block, lengths)[0]
+
+
+def nearest_novelty(matrix, k, exclude_self=True):
+    """
+    It selects the k nearest test cases, the ones with the lowest novelty, for every row of a novelty matrix
+
+    Args:
+      matrix: the novelty matrix of a block of test cases
+      k: the number of neighbours
+      exclude_self: True if the matrix compares the block to itself and the diagonal is ignored
+
+    Returns:
+      An array of shape (m, k) with the indices of the nearest test cases, sorted by novelty,
+      and an array of shape (m, k) with their novelty.
+    """
+    if exclude_self:
+        matrix = matrix.copy()
+        np.fill_diagonal(matrix, np.inf)
+    k = min(k, matrix.shape[1] - (1 if exclude_self else 0))
+    if k <= 0:
+        empty = np.empty((len(matrix), 0))
+        return empty.astype(int), empty
+    indices = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(matrix, indices, axis=1)
+    order = np.argsort(values, axis=1, kind="stable")
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def stack_genomes(genomes, capacity=None):
+    """
+    It copies several genomes into one contiguous block
+
+    Args:
+      genomes: a list of genomes or lists of states
+      capacity: the number of states of every row of the block, None for the length of the longest genome
+
+    Returns:
+      An int16 array of shape (n, capacity, 3) padded with zeros, and an array with the length of every genome.
+    """
+    lengths = np.array([len(g) for g in genomes], dtype=int)
+    if capacity is None:
+        capacity = int(lengths.max(initial=0))
+    block = np.zeros((len(genomes), capacity, STATE_SIZE), dtype=np.int16)
+    for i, genome in enumerate(genomes):
+        block[i, :lengths[i]] = as_array(genome)
+    return block, lengths
+
+
+def unstack_genomes(block, lengths):
+    """
+    Returns:
+      A list of genomes that are views of the rows of the block.
+    """
+    return [Genome.from_array(block[i], lengths[i]) for i in range(len(block))]
@@ -5,13 +5,18 @@ import matplotlib.patches as patches
 from shapely.geometry import LineString, Polygon
 from descartes import PolygonPatch
 import copy
+import numpy as np
 
 from ambiegen.utils.car_road import Map
-from ambiegen.utils.vehicle import Car
 import config as cf
 
 from ambiegen.utils.vehicle_evaluate import evaluate_scenario
 from ambiegen.utils.vehicle_evaluate import interpolate_road
+from ambiegen.utils.vehicle_evaluate import OUTCOME_INVALID
+from ambiegen.utils.batch_evaluate import evaluate_scenarios
+from ambiegen.utils.fitness_cache import get_fitness_cache
+from ambiegen.utils.road_geometry import RoadGeometry
+from ambiegen.solutions.genome import Genome, similar_states, novelty
 
 class VehicleSolution:
 
@@ -23,7 +28,7 @@ class VehicleSolution:
     def __init__(self):
 
         self.road_points = []
-        self.states = []
+        self.states = Genome()
         self.speed = 9
         self.steer_ang = 12
         self.map_size = cf.vehicle_env["map_size"]
@@ -32,6 +37,36 @@ class VehicleSolution:
         self.novelty = 0
         self.intp_points = []
         self.just_fitness = 0
+        self.outcome = None
+        self.evaluated_key = None
+        self.road_trace = None
+
+    @property
+    def states(self):
+        """
+        The states of the test case, stored as a Genome.
+        Lists of (action, length, angle) states are converted when they are assigned.
+        """
+        return self._states
+
+    @states.setter
+    def states(self, states):
+        self._states = states if isinstance(states, Genome) else Genome(states)
+
+    @property
+    def is_evaluated(self):
+        """
+        True if the fitness and road points were computed for the current states. The key of the
+        states is compared, so the solutions copied by the operators and then changed in place are
+        evaluated again, while the ones returned unchanged keep their fitness.
+        """
+        return self.evaluated_key is not None and self.evaluated_key == self.states.key()
+
+    def mark_evaluated(self):
+        """
+        It records that the fitness and road points correspond to the current states
+        """
+        self.evaluated_key = self.states.key()
 
     def eval_fitness(self):
         """
@@ -41,26 +76,99 @@ class VehicleSolution:
         points (self.intp_points).
         The function then takes the list of interpolated points and executes them with the simplified system model
         The function then calculates the fitness of the individual.
+        If the states were not changed since the last evaluation, the stored fitness is returned.
         Returns:
           The fitness of the individual.
         """
+        if self.is_evaluated:
+            return self.fitness
+
+        cache = get_fitness_cache()
+        if cache is not None:
+            cached = cache.get(self.states)
+            if cached is not None:
+                self.fitness, self.road_points, self.states, self.outcome = cached
+                self.mark_evaluated()
+                return self.fitness
+
+        original_states = self.states
         test_map = Map(self.map_size)
-        car = Car(self.speed, self.steer_ang, self.map_size)
-        road_points, new_states = test_map.get_points_from_states(self.states)
-        self.states = copy.deepcopy(new_states)
-        # print(self.states)
+        # the road is resumed from the trace of the parent the solution was created from
+        road_points, new_states = test_map.get_points_from_states(self.states, self.road_trace)
+        self.road_trace = test_map.trace
+        # the new states are the prefix of the states that builds a valid road
+        self.states = self.states[:len(new_states)]
         if len(road_points) <= 2:
             self.fitness = 0
+            self.outcome = OUTCOME_INVALID
         else:
-            self.intp_points = interpolate_road(road_points)
-            self.fitness, self.car_path = evaluate_scenario(
-                self.intp_points
+            geometry = RoadGeometry(road_points)
+            self.intp_points = interpolate_road(geometry)
+            self.fitness, self.car_path, self.outcome = evaluate_scenario(
+                geometry
             )
 
         self.road_points = road_points
 
+        if cache is not None:
+            cache.put(original_states, self.fitness, self.road_points, self.states, self.outcome)
+
+        self.mark_evaluated()
         return self.fitness
 
+    @staticmethod
+    def eval_fitness_batch(solutions):
+        """
+        The function evaluates a list of solutions at once. The road points of every solution are built
+        and interpolated as in eval_fitness, then all the roads are executed together with the
+        vectorized system model. The solutions whose states were not changed since their last
+        evaluation are skipped.
+
+        Args:
+          solutions: a list of VehicleSolution objects
+
+        Returns:
+          The list of fitness values of the solutions.
+        """
+        cache = get_fitness_cache()
+        to_execute = []
+        to_store = []
+        for s in solutions:
+            if s.is_evaluated:
+                continue
+            if cache is not None:
+                cached = cache.get(s.states)
+                if cached is not None:
+                    s.fitness, s.road_points, s.states, s.outcome = cached
+                    s.mark_evaluated()
+                    continue
+                to_store.append((s, s.states))
+
+            test_map = Map(s.map_size)
+            road_points, new_states = test_map.get_points_from_states(s.states, s.road_trace)
+            s.road_trace = test_map.trace
+            s.states = s.states[:len(new_states)]
+            s.road_points = road_points
+            if len(road_points) <= 2:
+                s.fitness = 0
+                s.outcome = OUTCOME_INVALID
+            else:
+                geometry = RoadGeometry(road_points)
+                s.intp_points = interpolate_road(geometry)
+                to_execute.append((s, geometry))
+
+        results = evaluate_scenarios([geometry for _, geometry in to_execute])
+        for (s, _), (fitness, car_path, outcome) in zip(to_execute, results):
+            s.fitness, s.car_path, s.outcome = fitness, car_path, outcome
+
+        for s, original_states in to_store:
+            cache.put(original_states, s.fitness, s.road_points, s.states, s.outcome)
+
+        for s in solutions:
+            s.mark_evaluated()
+
+        return [s.fitness for s in solutions]
+
 
     def intersect(self, tc1, tc2):
         """
@@ -73,18 +181,8 @@ class VehicleSolution:
         Returns:
           The list of similar elements in the two test cases 
         """
-        intersection = []
-        tc_size  = min(len(tc1), len(tc2))
-        for i in range(tc_size):
-            if tc1[i][0] == tc2[i][0]:
-                if tc1[i][0] == 0:
-                    if abs(tc1[i][1] - tc2[i][1]) <= 5:
-                        intersection.append(tc1[i])
-                else:
-                    if abs(tc1[i][2] - tc2[i][2]) <= 5:
-                        intersection.append(tc1[i])
-        return intersection
-                
+        return [tc1[i] for i in np.flatnonzero(similar_states(tc1, tc2))]
+
     def calculate_novelty(self, tc1, tc2):
         """
         > The novelty of two test cases is the proportion of states that are unique to each test case
@@ -95,11 +193,7 @@ class VehicleSolution:
         :param tc2: The test case that is being compared to the test suite
         :return: The novelty of the two test cases.
         """
-        intersection = self.intersect(tc1, tc2)
-        total_states = len(tc1) + len(tc2) - len(intersection)
-
-        novelty = 1 - len(intersection) / total_states
-        return -novelty
+        return -novelty(tc1, tc2)
 
     @staticmethod
     def build_image(states, save_path="test.png"):
@@ -114,11 +208,8 @@ class VehicleSolution:
         test_map = Map(map_size)
         road_points, new_states = test_map.get_points_from_states(states)
         states = copy.deepcopy(new_states)
-        speed = 9
-        steer_ang = 12
-        car = Car(speed, steer_ang, map_size)
-        #intp_points = car.interpolate_road(road_points)
-        intp_points = interpolate_road(road_points)
+        geometry = RoadGeometry(road_points)
+        intp_points = interpolate_road(geometry)
 
         fig, ax = plt.subplots(figsize=(8, 8))
         road_x = []
@@ -128,8 +219,7 @@ class VehicleSolution:
             road_x.append(p[0])
             road_y.append(p[1])
 
-        #fitness, car_path = car.execute_road(intp_points)
-        fitness, car_path = evaluate_scenario(intp_points)
+        fitness, car_path, _ = evaluate_scenario(geometry)
 
         if len(car_path):
             ax.plot(car_path[0], car_path[1], "bo", label="Car path")
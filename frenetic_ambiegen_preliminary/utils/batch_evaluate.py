@@ -0,0 +1,272 @@
+import math
+import logging as log
+import numpy as np
+
+import config as cf
+
+from ambiegen.utils.lane_controller import segment_table
+from ambiegen.utils.road_validity_check import is_valid_road
+from ambiegen.utils.road_geometry import RoadGeometry
+from ambiegen.utils.segment_index import is_simple_path
+from ambiegen.utils.vehicle_evaluate import interpolate_road, waypoint_spacing
+from ambiegen.utils.vehicle_evaluate import OUTCOME_INVALID, OUTCOME_COMPLETED, OUTCOME_MAX_STEPS, OUTCOME_DEVIATION
+
+
+class BatchKinematicModel:
+    '''
+    The BatchKinematicModel class is the vectorized counterpart of KinematicModel.
+    It stores the position, speed and yaw angle of N vehicles as NumPy arrays and
+    updates all of them at once.
+    '''
+    def __init__(self, x, y, yaw, speed):
+        self.x = np.asarray(x, dtype=float).copy()
+        self.y = np.asarray(y, dtype=float).copy()
+        self.yaw = np.asarray(yaw, dtype=float).copy()
+        self.speed = np.asarray(speed, dtype=float).copy()
+
+    def update(self, steering, acceleration, delta_time, speed, mask):
+        """
+        This function updates the position, speed, and yaw angle of the vehicles selected by the mask,
+        the update rule is the same as in KinematicModel.update.
+
+        Args:
+          steering: array with the steering input of every vehicle
+          acceleration: the acceleration applied to every vehicle
+          delta_time: The time elapsed since the last update of the vehicle's position and speed.
+          speed: array with the current speed of every vehicle
+          mask: boolean array, only the vehicles with a True value are updated
+        """
+        self.yaw[mask] += steering[mask] * delta_time
+        self.speed[mask] = speed[mask] + acceleration * delta_time
+        self.x[mask] += self.speed[mask] * np.cos(self.yaw[mask]) * delta_time
+        self.y[mask] += self.speed[mask] * np.sin(self.yaw[mask]) * delta_time
+
+
+class BatchLaneController:
+    """
+    The BatchLaneController class is the vectorized counterpart of LaneController.
+    The arc-length tables of all the roads are stored in arrays padded to the length of the longest road,
+    the real number of segments of every road is kept in the n_segments array.
+    """
+    def __init__(self, points_list, speed, lookahead=5, stop_distance=15):
+        n = len(points_list)
+        tables = [segment_table(points) for points in points_list]
+        self.n_segments = np.array([len(table[2]) for table in tables], dtype=int)
+        size = max(self.n_segments.max(initial=0), 1)
+        self.starts = np.zeros((n, size, 2))
+        self.units = np.zeros((n, size, 2))
+        self.lengths = np.zeros((n, size))
+        self.stations = np.full((n, size), np.inf)  # padded segments are never before a station
+        self.length = np.zeros(n)
+        for i, (starts, units, lengths, stations, length) in enumerate(tables):
+            k = len(lengths)
+            self.starts[i, :k] = starts
+            self.units[i, :k] = units
+            self.lengths[i, :k] = lengths
+            self.stations[i, :k] = stations
+            self.length[i] = length
+        self.headings = np.arctan2(self.units[:, :, 1], self.units[:, :, 0])
+
+        self.current_segment = np.zeros(n, dtype=int)
+        self.offset = np.zeros(n)
+        self.station = np.zeros(n)
+        self.heading = np.zeros(n)
+        self.done = np.zeros(n, dtype=bool)
+        self.max_steering = math.pi
+        self.window = 10
+        self.lookahead = lookahead
+        self.stop_distance = stop_distance
+        self.speed_increment = 1
+        self.max_speed = 30
+        self.speed = np.full(n, speed, dtype=float)
+        self.min_speed = 8
+        self.offsets = np.arange(self.window)
+        self.rows = np.arange(n)
+
+    def project(self, x, y, mask):
+        """
+        It projects the vehicles selected by the mask onto their roads, in the same way as LaneController.project.
+
+        Returns:
+          The array with the distance of every vehicle from its road, inf for the vehicles not selected.
+        """
+        rows = self.rows[mask]
+        idx = self.current_segment[mask][:, None] + self.offsets[None, :]
+        in_window = idx < self.n_segments[mask][:, None]
+        idx = np.minimum(idx, self.lengths.shape[1] - 1)
+
+        starts = self.starts[rows[:, None], idx]
+        ux = self.units[rows[:, None], idx, 0]
+        uy = self.units[rows[:, None], idx, 1]
+        dx = x[mask][:, None] - starts[:, :, 0]
+        dy = y[mask][:, None] - starts[:, :, 1]
+        along = dx*ux + dy*uy
+        along = np.minimum(np.maximum(along, 0.0), self.lengths[rows[:, None], idx])
+        px = dx - along*ux
+        py = dy - along*uy
+        squared_distance = px*px + py*py
+        squared_distance[~in_window] = np.inf
+
+        nearest = np.argmin(squared_distance, axis=1)
+        k = np.arange(len(rows))
+        segment = idx[k, nearest]
+        self.current_segment[rows] = segment
+        self.station[rows] = self.stations[rows, segment] + along[k, nearest]
+        self.offset[rows] = ux[k, nearest]*dy[k, nearest] - uy[k, nearest]*dx[k, nearest]
+        self.heading[rows] = self.headings[rows, segment]
+
+        distance = np.full(len(self.rows), np.inf)
+        distance[rows] = np.sqrt(squared_distance[k, nearest])
+        return distance
+
+    def target_point(self, rows):
+        """
+        Returns:
+          The points of the roads lookahead meters ahead of the projections of the vehicles in rows.
+        """
+        target_station = np.minimum(self.station[rows] + self.lookahead, self.length[rows])
+        after = np.sum(self.stations[rows] <= target_station[:, None], axis=1)
+        i = np.maximum(self.current_segment[rows], after) - 1
+        along = np.minimum(target_station - self.stations[rows, i], self.lengths[rows, i])
+        return (self.starts[rows, i, 0] + along*self.units[rows, i, 0],
+                self.starts[rows, i, 1] + along*self.units[rows, i, 1])
+
+    def control(self, x, y, yaw, speed, mask):
+        """
+        This function calculates the steering angle and speed of the vehicles selected by the mask,
+        following exactly the same rules as LaneController.control.
+
+        Args:
+          x: array with the current x-coordinate of every vehicle
+          y: array with the current y-coordinate of every vehicle
+          yaw: array with the current orientation of every vehicle
+          speed: array with the current speed of every vehicle
+          mask: boolean array, only the vehicles with a True value are controlled
+
+        Returns:
+          a tuple of arrays containing the steering angle, speed, distance from the road
+          and a flag indicating whether the vehicle has reached the end of the road.
+        """
+        n = len(self.rows)
+        steering = np.zeros(n)
+        closest_distance = self.project(x, y, mask)
+
+        self.done |= mask & (self.station >= self.length - self.stop_distance)
+        steer = mask & ~self.done
+        if steer.any():
+            rows = self.rows[steer]
+            target_x, target_y = self.target_point(rows)
+            dx = target_x - x[steer]
+            dy = target_y - y[steer]
+
+            target_yaw = np.arctan2(dy, dx)
+            target_yaw[dy > 0] -= 2*math.pi
+
+            # Calculate the steering angle
+            delta = target_yaw - yaw[steer]
+            new_speed = speed[steer].copy()
+
+            straight = np.abs(delta) < 0.4  # if the vehicle is going straight
+            new_speed[straight] = np.minimum(new_speed[straight] + self.speed_increment, self.max_speed)
+            sharp = ~straight & (np.abs(delta) > 1.2)
+            new_speed[sharp] = np.maximum(new_speed[sharp] - self.speed_increment/2, self.min_speed)
+            self.speed[steer] = new_speed
+
+            # Limit the steering angle
+            delta = np.where(delta > math.pi, delta - 2*math.pi, np.where(delta < -math.pi, delta + 2*math.pi, delta))
+            steering[steer] = np.clip(delta, -self.max_steering, self.max_steering)
+
+        return steering, self.speed.copy(), closest_distance, self.done.copy()
+
+
+def evaluate_scenarios(points_list):
+    """
+    The function evaluates a batch of scenarios by simulating all the vehicles in lockstep along their
+    waypoints. Vehicles that have reached the end of the road, or were stopped by the max_steps and
+    stop_deviation limits, are masked out, the rest keep driving.
+    The result for every road is the same as returned by evaluate_scenario.
+
+    Args:
+      points_list: a list of roads, each road is a list of tuples with the x and y coordinates of
+    the waypoints, or the RoadGeometry of the road.
+
+    Returns:
+      A list with a (fitness, [path_x, path_y], outcome) tuple for every road.
+    """
+    results = [(0, [[], []], OUTCOME_INVALID) for _ in points_list]
+    valid = []
+    valid_points = []
+    for i, points in enumerate(points_list):
+        if isinstance(points, RoadGeometry):
+            if is_valid_road(points, waypoint_spacing):
+                valid.append(i)
+                valid_points.append(interpolate_road(points))
+        elif is_valid_road(points):
+            valid.append(i)
+            valid_points.append(points)
+    if not valid:
+        return results
+
+    init_pos = np.array([[points[0][0], points[0][1]] for points in valid_points], dtype=float)
+    speed0 = 15
+    dt = 0.7
+    vehicle = BatchKinematicModel(init_pos[:, 0], init_pos[:, 1], np.zeros(len(valid)),
+                                  np.full(len(valid), speed0, dtype=float))
+    controller = BatchLaneController(valid_points, speed0)
+
+    max_steps = max(cf.vehicle_env["max_steps"], 1)
+    stop_deviation = cf.vehicle_env["stop_deviation"]
+    active = np.ones(len(valid), dtype=bool)
+    steps = np.zeros(len(valid), dtype=int)
+    outcomes = np.full(len(valid), OUTCOME_COMPLETED, dtype=object)
+
+    # the buffers are sized for the longest road, they grow only if a vehicle leaves its road
+    capacity = min(max_steps, int(controller.length.max() / (controller.min_speed * dt)) + 8)
+    path_x = np.empty((len(valid), capacity))
+    path_y = np.empty((len(valid), capacity))
+    distances = np.empty((len(valid), capacity))
+    step = 0
+    while active.any():
+        steering, speed, distance, done = controller.control(vehicle.x, vehicle.y, vehicle.yaw, vehicle.speed, active)
+        vehicle.update(steering, 0.1, dt, speed, active)
+        if step == path_x.shape[1]:
+            capacity = min(2 * step, max_steps)
+            path_x, path_y, distances = [
+                np.concatenate((buffer, np.empty((len(valid), capacity - step))), axis=1)
+                for buffer in (path_x, path_y, distances)
+            ]
+        path_x[:, step] = vehicle.x
+        path_y[:, step] = vehicle.y
+        distances[:, step] = distance
+        step += 1
+        steps[active] += 1
+        running = active & ~done
+        if stop_deviation is not None:
+            deviated = running & (steps > 7) & (distance > stop_deviation)
+            outcomes[deviated] = OUTCOME_DEVIATION
+            running &= ~deviated
+        capped = running & (steps >= max_steps)
+        if capped.any():
+            log.warning("The simulation of %d roads was stopped after %d steps", np.count_nonzero(capped), max_steps)
+            outcomes[capped] = OUTCOME_MAX_STEPS
+        active = running & ~capped
+
+    for k, i in enumerate(valid):
+        n = steps[k]
+        tot_x = path_x[k, :n]
+        tot_y = path_y[k, :n]
+        distance_list = np.concatenate(([0], distances[k, 7:n]))
+
+        if not is_simple_path(np.column_stack((tot_x, tot_y))):
+            distance_list = np.minimum(3, distance_list)
+
+        if outcomes[k] == OUTCOME_DEVIATION:
+            fitness = distance_list.max()
+        elif len(distance_list) > 1:
+            fitness = distance_list[:-1].max()
+        else:
+            fitness = distance_list.max()
+
+        results[i] = (-float(fitness), [tot_x[:-1], tot_y[:-1]], outcomes[k])
+
+    return results
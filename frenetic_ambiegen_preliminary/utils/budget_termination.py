@@ -0,0 +1,52 @@
+'''
+Module with the termination criteria used to run the search with a time or evaluation budget.
+'''
+import time
+
+from pymoo.core.termination import Termination, TerminateIfAny
+from pymoo.termination import get_termination
+
+
+class DeadlineTermination(Termination):
+    """
+    Time based termination that does not start a generation it can not finish before the deadline.
+    The duration of the next generation is estimated as the average duration of the previous ones,
+    so the search stops cleanly instead of overrunning the budget by a whole generation.
+    """
+
+    def __init__(self, max_time):
+        super().__init__()
+        self.max_time = max_time
+        self.n_updates = 0
+
+    def _update(self, algorithm):
+        elapsed = time.time() - algorithm.start_time
+        self.n_updates += 1
+        generation_time = elapsed / self.n_updates
+        return min((elapsed + generation_time) / self.max_time, 1.0)
+
+
+def get_budget_termination(n_gen, time_budget=None, eval_budget=None):
+    """
+    It builds the termination criterion of a run. Without a budget the run lasts n_gen generations,
+    otherwise it lasts until the first budget is used up.
+
+    Args:
+      n_gen: the number of generations to run when no budget is given
+      time_budget: the time budget of the run in seconds, None for no time limit
+      eval_budget: the maximum number of evaluations of the run, None for no limit
+
+    Returns:
+      The pymoo termination criterion.
+    """
+    criteria = []
+    if time_budget is not None:
+        criteria.append(DeadlineTermination(time_budget))
+    if eval_budget is not None:
+        criteria.append(get_termination("n_eval", eval_budget))
+
+    if not criteria:
+        return get_termination("n_gen", n_gen)
+    if len(criteria) == 1:
+        return criteria[0]
+    return TerminateIfAny(*criteria)
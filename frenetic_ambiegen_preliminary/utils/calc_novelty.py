@@ -1,5 +1,7 @@
 
-from ambiegen.solutions import VehicleSolution
+import numpy as np
+
+from ambiegen.solutions.genome import novelty as genome_novelty, block_novelty, novelty_matrix, stack_genomes
 
 
 def calc_novelty(state1, state2, problem):
@@ -17,6 +19,78 @@ def calc_novelty(state1, state2, problem):
     """
 
     if problem == "vehicle":
-        novelty = abs(VehicleSolution().calculate_novelty(state1, state2))
+        novelty = genome_novelty(state1, state2)
+
+    return novelty
+
+def calc_population_novelty(states, best_scenarios, fitness):
+    """
+    > The function returns the average novelty of a test case with respect to the best test cases
+    of the current population. Test cases that do not reveal enough faults get no novelty.
+
+    Args:
+      states: the states of the evaluated test case
+      best_scenarios: the block with the states of the best test cases of the population and their lengths
+      fitness: the fitness of the evaluated test case
+
+    Returns:
+      The average novelty of the test case.
+    """
+    block, lengths = best_scenarios
+    if len(block) and (fitness < -1):
+        novelty_list = (-block_novelty(states, block, lengths)).tolist()
+        return sum(novelty_list)/len(novelty_list)
+    return 0
+
+
+def calc_population_novelties(genomes, best_scenarios, fitness):
+    """
+    > The same as calc_population_novelty for several test cases, with one novelty matrix
+    between the test cases and the best test cases of the population.
+
+    Args:
+      genomes: the states of the evaluated test cases
+      best_scenarios: the block with the states of the best test cases of the population and their lengths
+      fitness: an array with the fitness of the evaluated test cases
+
+    Returns:
+      An array with the average novelty of every test case.
+    """
+    block, lengths = best_scenarios
+    novelty = np.zeros(len(genomes))
+    if len(block):
+        matrix = novelty_matrix(*stack_genomes(genomes), block, lengths)
+        for i in np.flatnonzero(np.asarray(fitness) < -1):
+            novelty_list = (-matrix[i]).tolist()
+            novelty[i] = sum(novelty_list)/len(novelty_list)
+    return novelty
+
+
+def calc_suite_novelty(genomes):
+    """
+    > The function returns the average novelty of all the pairs of test cases of a test suite
+
+    Args:
+      genomes: the states of the test cases of the suite
+
+    Returns:
+      The average novelty of the suite.
+    """
+    matrix = novelty_matrix(*stack_genomes(genomes))
+    novelty_list = matrix[np.triu_indices(len(genomes), 1)].tolist()
+    return sum(novelty_list) / len(novelty_list)
+
+
+def get_best_scenarios(algorithm, n_best=5):
+    """
+    It returns the states of the first n_best individuals of the current population of the algorithm
 
-    return novelty
\ No newline at end of file
+    Args:
+      algorithm: the running algorithm
+      n_best: the number of individuals to take. Defaults to 5
+
+    Returns:
+      The states stacked in one block, and the number of states of every individual.
+    """
+    solutions = algorithm.pop.get("X")
+    return stack_genomes([solutions[i][0].states for i in range(min(n_best, len(solutions)))])
@@ -6,6 +6,36 @@ from shapely.geometry import Point
 from shapely.geometry.polygon import Polygon
 import logging as log
 
+
+class RoadTrace:
+    """
+    The record of the construction of a road: the states that were applied, and the road point and
+    base vector position after every one of them. The construction only appends to these lists, so
+    a test case that starts with the same states can resume from the last shared state.
+    """
+
+    __slots__ = ("states", "road_points", "positions")
+
+    def __init__(self, states, road_points, positions):
+        self.states = states
+        self.road_points = road_points
+        self.positions = positions
+
+    def shared_prefix(self, states):
+        """
+        Returns:
+          The number of leading states of the test case that were applied in this trace.
+        """
+        states = np.asarray(states).reshape(-1, 3)
+        n = min(len(self.states), len(states))
+        different = np.flatnonzero(np.any(self.states[:n] != states[:n], axis=1))
+        return int(different[0]) if len(different) else n
+
+    def __deepcopy__(self, memo):
+        # the trace is never changed, the copies of a solution can share it
+        return self
+
+
 class Map:
     """Class that conducts transformations to vectors automatically,
     using the commads "go straight", "turn left", "turn right".
@@ -366,13 +396,16 @@ class Map:
         )
         return polygon.contains(point)
 
-    def get_points_from_states(self, states):
+    def get_points_from_states(self, states, checkpoint=None):
         """
         It takes a list of states, and for each state, it performs the action specified by the state, and
-        then appends the resulting road points to a list
+        then appends the resulting road points to a list.
+        The trace of the construction is kept in self.trace.
 
         Args:
           states: a list of tuples, each tuple is (action, angle, distance)
+          checkpoint: the RoadTrace of an evaluated test case, the construction resumes after the
+        states the two test cases have in common
 
         Returns:
           The points of the road.
@@ -385,7 +418,16 @@ class Map:
 
         tc = states
         new_states = []
-        for state in tc:
+        start = 0 if checkpoint is None else checkpoint.shared_prefix(states)
+        if start > 0:
+            # every applied state added one road point and one position
+            self.road_points_list = checkpoint.road_points[:start + 1]
+            self.all_position_list = checkpoint.positions[:start + 1]
+            self.current_pos = self.all_position_list[-1]
+            new_states = list(tc[:start])
+            log.debug("Resuming the road construction after %d states", start)
+
+        for state in tc[start:]:
             new_states.append(state)
             action = state[0]
             if action == 0:
@@ -408,7 +450,11 @@ class Map:
                     break
             else:
                 log.error("ERROR, invalid action")
-            
+
+        applied = len(self.all_position_list) - 1
+        self.trace = RoadTrace(
+            np.array(tc[:applied]).reshape(-1, 3), self.road_points_list, self.all_position_list
+        )
 
         points = self.road_points_list[:-1]
 
@@ -0,0 +1,103 @@
+'''
+Module with the vectorized kernels used to check the sharpness of roads.
+All the functions accept one road as an (N, 2) array or a batch of roads as an (M, N, 2) array
+padded to the length of the longest road, with the real length of every road given in lengths.
+'''
+import numpy as np
+
+FEET_PER_METER = 3.280839895
+
+
+def _as_batch(points, lengths=None):
+    points = np.asarray(points, dtype=float)[..., :2]
+    single = points.ndim == 2
+    if single:
+        points = points[None]
+    if lengths is None:
+        lengths = np.full(len(points), points.shape[1], dtype=int)
+    return points, np.asarray(lengths, dtype=int), single
+
+
+def gradient(values, lengths):
+    """
+    Same as np.gradient along the last axis of every row, but only the first lengths[i] values of
+    the row i are used, the rest of the row is set to nan.
+
+    :param values: array (M, N) of padded rows
+    :param lengths: array (M,) with the number of values of every row, at least 2
+    :return: array (M, N) with the gradient of every row
+    """
+    out = np.full(values.shape, np.nan)
+    out[:, 1:-1] = (values[:, 2:] - values[:, :-2]) / 2.0
+    out[:, 0] = values[:, 1] - values[:, 0]
+    rows = np.arange(len(values))
+    last = lengths - 1
+    out[rows, last] = values[rows, last] - values[rows, last - 1]
+    out[np.arange(values.shape[1])[None, :] >= lengths[:, None]] = np.nan
+    return out
+
+
+def curvature(points, lengths=None):
+    """
+    Derivative based curvature of the road points, the same as computed with np.gradient.
+
+    :param points: array (N, 2) of road points or (M, N, 2) of padded roads
+    :param lengths: the number of points of every road of the batch, None if the roads are not padded
+    :return: array (N,) or (M, N) with the signed curvature at every point, nan for the padding
+    """
+    points, lengths, single = _as_batch(points, lengths)
+    dx = gradient(points[:, :, 0], lengths)
+    dy = gradient(points[:, :, 1], lengths)
+    ddx = gradient(dx, lengths)
+    ddy = gradient(dy, lengths)
+    result = (dx * ddy - dy * ddx) / (dx**2 + dy**2)**1.5
+    return result[0] if single else result
+
+
+def circumradius(points, w=5, lengths=None):
+    """
+    Radius of the circle through the first, middle and last point of every window of w points.
+    The windows start at the points 0 to N - w - 1, as in the original min_radius loop.
+
+    :param points: array (N, 2) of road points or (M, N, 2) of padded roads
+    :param w: the window size
+    :param lengths: the number of points of every road of the batch, None if the roads are not padded
+    :return: array (N - w,) or (M, N - w) with the radius of every window, inf for collinear points and padding
+    """
+    points, lengths, single = _as_batch(points, lengths)
+    n_windows = max(points.shape[1] - w, 0)
+    p1 = points[:, :n_windows]
+    p2 = points[:, int((w - 1) / 2):int((w - 1) / 2) + n_windows]
+    p3 = points[:, w - 1:w - 1 + n_windows]
+    x1, y1 = p1[..., 0], p1[..., 1]
+    x2, y2 = p2[..., 0], p2[..., 1]
+    x3, y3 = p3[..., 0], p3[..., 1]
+
+    temp = x2 * x2 + y2 * y2
+    bc = (x1 * x1 + y1 * y1 - temp) / 2
+    cd = (temp - x3 * x3 - y3 * y3) / 2
+    det = (x1 - x2) * (y2 - y3) - (x2 - x3) * (y1 - y2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cx = (bc * (y2 - y3) - cd * (y1 - y2)) / det
+        cy = ((x1 - x2) * cd - (x2 - x3) * bc) / det
+    radius = np.sqrt((cx - x1) ** 2 + (cy - y1) ** 2)
+
+    invalid = (np.abs(det) < 1.0e-6) | np.isnan(radius) | (np.arange(n_windows)[None, :] >= (lengths - w)[:, None])
+    radius[invalid] = np.inf
+    return radius[0] if single else radius
+
+
+def min_radius(points, w=5, lengths=None):
+    """
+    Minimum radius of curvature of the road over all the windows of w points, in feet.
+
+    :param points: array (N, 2) of road points or (M, N, 2) of padded roads
+    :param w: the window size
+    :param lengths: the number of points of every road of the batch, None if the roads are not padded
+    :return: the minimum radius of the road, or an array with the minimum radius of every road.
+    0 if all the windows are straight
+    """
+    radius = circumradius(points, w, lengths)
+    mr = radius.min(axis=-1, initial=np.inf)
+    mr = np.where(mr == np.inf, 0, mr)
+    return mr * FEET_PER_METER
@@ -0,0 +1,159 @@
+'''
+Module for caching the results of the fitness evaluation on disk.
+'''
+import os
+import json
+import sqlite3
+import hashlib
+import logging as log
+from collections import OrderedDict
+
+import config as cf
+
+# Increase when the evaluation of the roads changes, so that old results are not reused
+EVAL_VERSION = 3
+
+# The configuration values that influence the result of the evaluation
+CACHE_ENV_KEYS = ("map_size", "max_steps", "stop_deviation")
+
+
+def canonical_key(states):
+    """
+    It computes a content hash of a test case. The states are converted to plain numbers, so that
+    the same test case gives the same key whether it is stored as tuples, lists or NumPy values.
+
+    Args:
+      states: a list of (action, length, angle) states
+
+    Returns:
+      The hexadecimal hash of the test case and the relevant configuration.
+    """
+    genome = [[round(float(v), 6) for v in state] for state in states]
+    env = {key: cf.vehicle_env[key] for key in CACHE_ENV_KEYS}
+    payload = json.dumps([EVAL_VERSION, env, genome], separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class FitnessCache:
+    """
+    Content-addressed store of evaluated test cases.
+    The results are kept in a SQLite database, that can be shared between several
+    runs on the same machine, with an in-memory LRU cache in front of it.
+    """
+
+    def __init__(self, path, memory_size=10000):
+        self.path = path
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS fitness ("
+            "key TEXT PRIMARY KEY, fitness REAL, road_points TEXT, states TEXT, outcome TEXT)"
+        )
+        # the databases created before the outcome was stored get the new column, their rows
+        # have the keys of an older EVAL_VERSION and are not read
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(fitness)")]
+        if "outcome" not in columns:
+            try:
+                self.connection.execute("ALTER TABLE fitness ADD COLUMN outcome TEXT")
+            except sqlite3.OperationalError as e:
+                # another process opening the same database added it first
+                if "duplicate column" not in str(e):
+                    raise
+        self.connection.commit()
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get(self, states):
+        """
+        It looks up the result of a test case, first in memory and then on disk
+
+        Args:
+          states: the states of the test case
+
+        Returns:
+          A tuple with the fitness, road points, trimmed states and simulation outcome, or None
+        if the test case was not evaluated yet.
+        """
+        key = canonical_key(states)
+        if key in self.memory:
+            self.hits += 1
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        row = self.connection.execute(
+            "SELECT fitness, road_points, states, outcome FROM fitness WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        value = (row[0], json.loads(row[1]), [tuple(state) for state in json.loads(row[2])], row[3])
+        self._remember(key, value)
+        return value
+
+    def put(self, states, fitness, road_points, new_states, outcome):
+        """
+        It stores the result of a test case
+
+        Args:
+          states: the states of the test case, used as the key
+          fitness: the fitness of the test case
+          road_points: the road points built from the states
+          new_states: the states trimmed to the valid part of the road
+          outcome: the outcome of the simulation of the road
+        """
+        key = canonical_key(states)
+        road_points = [[float(p[0]), float(p[1])] for p in road_points]
+        new_states = [[int(v) if float(v).is_integer() else float(v) for v in state] for state in new_states]
+        self._remember(key, (float(fitness), road_points, [tuple(state) for state in new_states], outcome))
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO fitness VALUES (?, ?, ?, ?, ?)",
+                (key, float(fitness), json.dumps(road_points), json.dumps(new_states), outcome),
+            )
+
+    def close(self):
+        """
+        It closes the connection to the database
+        """
+        log.info("Fitness cache %s: %d hits, %d misses", self.path, self.hits, self.misses)
+        self.connection.close()
+
+
+_fitness_cache = None
+
+
+def set_fitness_cache(path, memory_size=10000):
+    """
+    It opens the fitness cache used by the current process, or disables it if the path is None
+
+    Args:
+      path: the path of the SQLite database
+      memory_size: the number of results kept in memory
+    """
+    global _fitness_cache
+    _fitness_cache = FitnessCache(path, memory_size) if path is not None else None
+    return _fitness_cache
+
+
+def get_fitness_cache():
+    """
+    Returns:
+      The fitness cache of the current process, or None if caching is disabled.
+    """
+    return _fitness_cache
@@ -2,51 +2,55 @@ import numpy as np
 import numpy.random as ra
 
 
+def frenet_to_cartesian_batch(x0, y0, theta0, ds, kappas, lengths=None, lane_width=0, map_size=np.inf):
+    """Convert many roads given as curvature sequences to Cartesian points in one call.
+
+    The heading is the cumulative sum of kappa * ds and the positions are the cumulative sums
+    of the steps along the heading. Road i uses the first lengths[i] curvature values of row i,
+    the padding after them is ignored.
+
+    Returns the points (m, n + 2, 2), the headings (m, n + 1), the bounding boxes (m, 4) as
+    (min_x, min_y, max_x, max_y) and the is_in_map and is_reframable flags of every road.
+    Point j of road i is only meaningful for j <= lengths[i] + 1.
+    """
+    kappas = np.atleast_2d(np.asarray(kappas, dtype=float))
+    m, n = kappas.shape
+    if lengths is None:
+        lengths = np.full(m, n)
+    lengths = np.asarray(lengths)
+    mask = np.arange(n)[None, :] < lengths[:, None]
+
+    # theta_j = theta0 + sum of the first j curvature steps
+    steps = np.where(mask, kappas * ds, 0.0)
+    headings = np.add.accumulate(np.column_stack((np.full(m, theta0, dtype=float), steps)), axis=1)
+
+    xs = np.add.accumulate(np.column_stack((np.full(m, x0, dtype=float), ds * np.cos(headings))), axis=1)
+    ys = np.add.accumulate(np.column_stack((np.full(m, y0, dtype=float), ds * np.sin(headings))), axis=1)
+    points = np.stack((xs, ys), axis=2)
+
+    valid = np.arange(n + 2)[None, :] <= (lengths + 1)[:, None]
+    min_x = np.where(valid, xs, np.inf).min(axis=1)
+    min_y = np.where(valid, ys, np.inf).min(axis=1)
+    max_x = np.where(valid, xs, -np.inf).max(axis=1)
+    max_y = np.where(valid, ys, -np.inf).max(axis=1)
+    bounding_boxes = np.column_stack((min_x, min_y, max_x, max_y))
+
+    is_reframable = (max_x - min_x <= map_size - 2 * lane_width) & (max_y - min_y <= map_size - 2 * lane_width)
+    is_in_map = (max_x < map_size - lane_width) & (min_x > lane_width) & (max_y < map_size - lane_width) & (min_y > lane_width)
+    return points, headings, bounding_boxes, is_in_map, is_reframable
+
+
 def frenet_to_cartesian_road_points(x0, y0, theta0, ds, kappas):
-    road_points = [(x0, y0)]
-    x = x0
-    y = y0
-    theta = theta0
-    n = len(kappas) + 1
-    for i in range(n):
-        x = x + (ds * np.cos(theta))
-        y = y + (ds * np.sin(theta))
-        road_points.append((x, y))
-        if i < n - 1:
-            theta = theta + (kappas[i] * ds)
-    return road_points
+    points, _, _, _, _ = frenet_to_cartesian_batch(x0, y0, theta0, ds, [kappas])
+    return [(x, y) for x, y in points[0]]
 
 
 def frenet_to_cartesian_road_points_with_reframability_check(x0, y0, theta0, ds, kappas, lane_width, map_size):
-    road_points = [(x0, y0)]
-    x = x0
-    y = y0
-    theta = theta0
-    n = len(kappas) + 1
-    min_x = x
-    min_y = y
-    max_x = x
-    max_y = y
-    for i in range(n):
-        x = x + (ds * np.cos(theta))
-        y = y + (ds * np.sin(theta))
-        road_points.append((x, y))
-        if i < n - 1:
-            theta = theta + (kappas[i] * ds)
-
-        if x < min_x:
-            min_x = x
-        if y < min_y:
-            min_y = y
-
-        if x > max_x:
-            max_x = x
-        if y > max_y:
-            max_y = y
-
-    is_reframable = (max_x - min_x <= map_size - 2 * lane_width) and (max_y - min_y <= map_size - 2 * lane_width)
-    is_in_map = (max_x < map_size - lane_width) and (min_x > lane_width) and (max_y < map_size - lane_width) and (min_y > lane_width)
-    return road_points, is_in_map, is_reframable, min_x, min_y
+    points, _, boxes, is_in_map, is_reframable = frenet_to_cartesian_batch(
+        x0, y0, theta0, ds, [kappas], lane_width=lane_width, map_size=map_size)
+    road_points = [(x, y) for x, y in points[0]]
+    min_x, min_y, _, _ = boxes[0]
+    return road_points, bool(is_in_map[0]), bool(is_reframable[0]), min_x, min_y
 
 
 def divide_and_sample(min_value, max_value, n, i):
@@ -1,6 +1,6 @@
-from itertools import combinations
 import logging as log
-from ambiegen.utils.calc_novelty import calc_novelty
+from collections import Counter
+from ambiegen.utils.calc_novelty import calc_suite_novelty
 import config as cf
 
 def get_stats(res, problem, algo):
@@ -13,35 +13,32 @@ def get_stats(res, problem, algo):
       problem: the problem we're trying to solve
 
     Returns:
-      A dictionary with the fitness, novelty, and convergence of the results.
+      A dictionary with the fitness, novelty, and convergence of the results, and the number of
+      individuals of the final population for every outcome of the simulation.
     """
     res_dict = {}
-    gen = len(res.history) - 1
     results = []
-    population = -res.history[gen].pop.get("F")
+    population = -res.pop.get("F")
     if algo != "nsga2":
         population = sorted(population, key=lambda x: x[0], reverse=True)
     for i in range(cf.ga["test_suite_size"]):
 
 
-        #result = res.history[gen].pop.get("F")[i][0]
         results.append(population[i][0])
 
-    gen = len(res.history) - 1
-    novelty_list = []
-    test_population = res.history[gen].pop.get("X")
+    test_population = res.pop.get("X")
     if algo != "nsga2":
         test_population = sorted(test_population, key=lambda x: abs(x[0].fitness), reverse=True)
-    for i in combinations(range(0, cf.ga["test_suite_size"]), 2):
-        current1 = test_population[i[0]] #res.history[gen].pop.get("X")[i[0]]
-        current2 = test_population[i[1]] #res.history[gen].pop.get("X")[i[1]]
-        nov = calc_novelty(current1[0].states, current2[0].states, problem)
-        novelty_list.append(nov)
-    novelty = sum(novelty_list) / len(novelty_list)
+    # the novelty of every pair of the test suite is read from one novelty matrix
+    novelty = calc_suite_novelty([x[0].states for x in test_population[:cf.ga["test_suite_size"]]])
 
     log.info("The highest fitness found: %f", max(results))
     log.info("Average diversity: %f", novelty)
+    # the roads stopped early by the max_steps or stop_deviation limits are reported apart
+    outcomes = dict(Counter(str(x[0].outcome) for x in res.pop.get("X")))
+    log.info("Simulation outcomes: %s", outcomes)
     res_dict["fitness"] = results
     res_dict["novelty"] = novelty
+    res_dict["outcomes"] = outcomes
 
     return res_dict
\ No newline at end of file
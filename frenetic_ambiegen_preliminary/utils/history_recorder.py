@@ -0,0 +1,48 @@
+'''
+Module for recording the progress of the search without keeping copies of the algorithm.
+'''
+import numpy as np
+from pymoo.core.callback import Callback
+
+from ambiegen.solutions.genome import stack_genomes
+
+
+class HistoryRecorder(Callback):
+    """
+    Callback that records the best objective values of every generation.
+    It replaces save_history=True, which deep-copies the whole algorithm with all the individuals
+    every generation, so the memory and the time spent per generation do not grow with n_gen.
+    Optionally, a compact snapshot of the population (objective values, and the states as one block
+    with the length of every test case) is stored every snapshot_every generations.
+    """
+
+    def __init__(self, snapshot_every=None):
+        super().__init__()
+        self.snapshot_every = snapshot_every
+        self.best_F = []
+        self.n_evals = []
+        self.snapshots = {}
+
+    def notify(self, algorithm):
+        F = algorithm.pop.get("F")
+        self.best_F.append(F.min(axis=0))
+        self.n_evals.append(algorithm.evaluator.n_eval)
+
+        if self.snapshot_every and (algorithm.n_gen - 1) % self.snapshot_every == 0:
+            states, lengths = stack_genomes([x[0].states for x in algorithm.pop.get("X")])
+            self.snapshots[algorithm.n_gen] = {
+                "F": F.copy(),
+                "states": states,
+                "lengths": lengths,
+            }
+
+    @property
+    def n_gen(self):
+        return len(self.best_F)
+
+    def get_best_F(self):
+        """
+        Returns:
+          An array of shape (n_gen, n_obj) with the best value of every objective in every generation.
+        """
+        return np.array(self.best_F)
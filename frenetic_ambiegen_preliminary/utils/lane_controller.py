@@ -1,32 +1,115 @@
 import math
+from bisect import bisect_right
+
+import numpy as np
+
+
+def segment_table(waypoints):
+    """
+    It precomputes the arc-length table of the polyline through the waypoints
+
+    Args:
+      waypoints: a list of (x, y) points
+
+    Returns:
+      The arrays with the start points, unit directions, lengths and stations (arc length at the
+    start) of the segments, and the total length of the polyline.
+    """
+    points = np.array([[p[0], p[1]] for p in waypoints], dtype=float)
+    delta = np.diff(points, axis=0)
+    lengths = np.sqrt(delta[:, 0]**2 + delta[:, 1]**2)
+    units = delta / np.maximum(lengths, 1e-12)[:, None]
+    stations = np.concatenate(([0.0], np.cumsum(lengths)))
+    return points[:-1], units, lengths, stations[:-1], float(stations[-1])
+
 
 class LaneController:
     """
     The LaneController class implements a controller for a vehicle to follow a given set of waypoints
     while adjusting speed and steering angle based on the current position and orientation of the
     vehicle.
-    The LaneController class implements a controller for a lane with various parameters such as speed
-    and waypoints.
+    The vehicle is projected exactly onto the polyline through the waypoints with a precomputed
+    arc-length table, which gives the lateral offset, station and heading of the vehicle. The search
+    starts at the segment of the previous projection, so it takes constant time per step, and the
+    vehicle steers towards the point of the road lookahead meters ahead of its projection.
     """
-    def __init__(self, waypoints, speed):
+    def __init__(self, waypoints, speed, lookahead=5, stop_distance=15):
         self.waypoints = waypoints
-        self.current_waypoint = 0
+        starts, units, lengths, stations, self.length = segment_table(waypoints)
+        self.segments = [tuple(v) for v in np.column_stack((starts, units, lengths)).tolist()]
+        self.stations = stations.tolist()
+        self.headings = np.arctan2(units[:, 1], units[:, 0]).tolist()
+        self.current_segment = 0
+        self.offset = 0
+        self.station = 0
+        self.heading = 0
         self.done = False
         self.max_steering = math.pi
         #self.cutoff_frequency = 3
         self.previous_yaw = 0
         self.window = 10
-        self.point_limit = 10
+        self.lookahead = lookahead
+        self.stop_distance = stop_distance
         self.speed_increment = 1
         self.max_speed = 30
         self.speed = speed
         self.min_speed = 8
 
+    def project(self, x, y):
+        """
+        It projects the position of the vehicle onto the road. Only the segments within the window
+        starting at the current segment are searched, so the vehicle can not go back along the road.
+
+        Args:
+          x: The current x-coordinate of the vehicle
+          y: The current y-coordinate of the vehicle
+
+        Returns:
+          The distance of the vehicle from the road.
+        """
+        segments = self.segments
+        closest = float('inf')
+        closest_segment, closest_along = self.current_segment, 0.0
+        for i in range(self.current_segment, min(self.current_segment + self.window, len(segments))):
+            sx, sy, ux, uy, length = segments[i]
+            dx = x - sx
+            dy = y - sy
+            along = dx*ux + dy*uy
+            if along < 0:
+                along = 0.0
+            elif along > length:
+                along = length
+            px = dx - along*ux
+            py = dy - along*uy
+            squared_distance = px*px + py*py
+            if squared_distance < closest:
+                closest = squared_distance
+                closest_segment, closest_along = i, along
+
+        sx, sy, ux, uy, _ = segments[closest_segment]
+        self.current_segment = closest_segment
+        self.station = self.stations[closest_segment] + closest_along
+        self.offset = ux*(y - sy) - uy*(x - sx)
+        self.heading = self.headings[closest_segment]
+        closest_distance = math.sqrt(closest)
+        return closest_distance
+
+    def target_point(self):
+        """
+        Returns:
+          The point of the road lookahead meters ahead of the projection of the vehicle.
+        """
+        target_station = min(self.station + self.lookahead, self.length)
+        i = bisect_right(self.stations, target_station, self.current_segment) - 1
+        sx, sy, ux, uy, length = self.segments[i]
+        along = min(target_station - self.stations[i], length)
+        return sx + along*ux, sy + along*uy
+
     def control(self, x, y, yaw, speed):
         """
         This function calculates the steering angle and speed of a vehicle based on its current position
-        and the closest waypoint.
-        
+        and its projection onto the road.
+
         Args:
           x: The current x-coordinate of the vehicle
           y: The "y" parameter in the "control" function is the current y-coordinate of the vehicle's
@@ -34,44 +117,33 @@ class LaneController:
           yaw: Yaw is the current orientation of the vehicle, measured in radians from the positive
         x-axis.
           speed: The current speed of the vehicle.
-        
+
         Returns:
-          a tuple containing the steering angle, speed, closest distance to the next waypoint, and a
-        boolean indicating whether the vehicle has reached the end of the waypoints.
+          a tuple containing the steering angle, speed, distance from the road, and a
+        boolean indicating whether the vehicle has reached the end of the road.
         """
-        # Find the next waypoint
-        closest_distance = float('inf')
-        closest_waypoint = self.current_waypoint
-        
-        for i, waypoint in enumerate(self.waypoints[self.current_waypoint:self.point_limit]):
-            self.point_limit = min(len(self.waypoints)-1,self.current_waypoint + self.window)
-            distance = math.sqrt((x - waypoint[0])**2 + (y - waypoint[1])**2)
-            if distance < closest_distance:
-                closest_distance = distance
-                #i = min(i, 10)
-                closest_waypoint = i + self.current_waypoint
-        self.current_waypoint = closest_waypoint
-
-        # Calculate the target yaw based on the waypoint
-        if self.current_waypoint >=  len(self.waypoints) - 4:
+        closest_distance = self.project(x, y)
+
+        # Calculate the target yaw based on the point ahead on the road
+        if self.station >= self.length - self.stop_distance:
             self.done = True
             steering = 0
         else:
+            target_x, target_y = self.target_point()
+            dx = target_x - x
+            dy = target_y - y
 
-            dx = self.waypoints[self.current_waypoint+1][0] - x
-            dy = self.waypoints[self.current_waypoint+1][1] - y
-            
             target_yaw = math.atan2(dy, dx)
             if dy > 0:# and dx < 0:
                 target_yaw -= 2*math.pi
-            
+
             self.previous_yaw = target_yaw
 
             # Calculate the steering angle
             steering = target_yaw - yaw
 
             self.speed = speed
-            
+
             if abs(target_yaw - yaw) < 0.4: # if the vehicle is going straight
                 self.speed += self.speed_increment
                 if self.speed > self.max_speed:
@@ -82,7 +154,7 @@ class LaneController:
                     self.speed = self.min_speed
 
             # Limit the steering angle
-            
+
             if steering > math.pi:
                 steering = steering - 2*math.pi
             elif steering < -math.pi:
@@ -92,7 +164,3 @@ class LaneController:
             steering = max(steering, -self.max_steering)
 
         return steering, self.speed, closest_distance, self.done
-
-
-
-
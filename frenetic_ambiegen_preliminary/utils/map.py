@@ -1,6 +1,7 @@
 import numpy as np
 import config as cf
-from ambiegen.utils.frenet import frenet_to_cartesian_road_points_with_reframability_check
+from ambiegen.utils.frenet import frenet_to_cartesian_batch
+from ambiegen.utils.segment_index import SegmentGrid, has_self_intersection
 from ambiegen.utils.road_validity_check import is_valid_road
 from ambiegen.utils.vehicle_evaluate import interpolate_road
 
@@ -23,32 +24,41 @@ class FrenetMap:
         :param lane_width: Lane width for the road
         :return: List of road points in Cartesian coordinates
         """
-        x, y, theta = self.map_size / 2, self.map_size / 2, 0.0  # Initial position
-        road_points = []
-
-        for kappa in kappas:
-            # 计算每个曲率点
-            delta_x = ds * np.cos(theta)
-            delta_y = ds * np.sin(theta)
-            x += delta_x
-            y += delta_y
-            theta += kappa * ds  # 更新方向
-
-            # 保存当前点
-            road_points.append((x, y, theta))
+        road_points = self.generate_roads([kappas], ds, lane_width)[0]
 
         self.road_points = road_points
         return road_points
 
+    def generate_roads(self, kappas, ds, lane_width, lengths=None):
+        """
+        Generates several roads at once using Frenet coordinates.
+        :param kappas: 2-D array of curvature values, one road per row, padded to the same length
+        :param ds: Step size along the road
+        :param lane_width: Lane width for the road
+        :param lengths: Number of curvature values of every road, None if all rows are used completely
+        :return: List with the road points of every road in Cartesian coordinates
+        """
+        kappas = np.asarray(kappas, dtype=float).reshape(len(kappas), -1)
+        if lengths is None:
+            lengths = np.full(len(kappas), kappas.shape[1])
+        points, headings, _, _, _ = frenet_to_cartesian_batch(
+            self.map_size / 2, self.map_size / 2, 0.0, ds, kappas, lengths, lane_width, self.map_size
+        )
+
+        # every point is stored with the heading after its curvature was applied
+        roads = []
+        for i, n in enumerate(lengths):
+            roads.append([(x, y, theta) for (x, y), theta in zip(points[i, 1:n + 1], headings[i, 1:n + 1])])
+        return roads
+
     def get_points_from_frenet_scenario(self, scenario):
         """
         Converts a given Frenet scenario into a list of Cartesian points.
         :param scenario: A list of (action, length, curvature)
         :return: A list of road points in Cartesian coordinates
         """
-        x, y, theta = self.map_size / 2, self.map_size / 2, 0.0  # Initial position
-        road_points = []
-
+        ds = 1.0  # Step size
+        kappas = []
         for action, length, curvature in scenario:
             if action == 0:  # Go straight
                 kappa = 0
@@ -58,17 +68,10 @@ class FrenetMap:
                 kappa = curvature
 
             # Generate points for this segment
-            ds = 1.0  # Step size
             num_steps = int(length / ds)
-            for _ in range(num_steps):
-                delta_x = ds * np.cos(theta)
-                delta_y = ds * np.sin(theta)
-                x += delta_x
-                y += delta_y
-                theta += kappa * ds  # Update direction
-                road_points.append((x, y, theta))
-        # print(road_points)
-        return road_points
+            kappas += [kappa] * num_steps
+
+        return self.generate_roads([kappas], ds, 0)[0]
 
     def is_valid_road(self, road_points):
         """
@@ -82,22 +85,74 @@ class FrenetMap:
                 return False
 
         # Check for self-intersections
-        def ccw(A, B, C):
-            return (B[0] - A[0]) * (C[1] - A[1]) - (B[1] - A[1]) * (C[0] - A[0])
-
-        def intersect(A, B, C, D):
-            return (ccw(A, B, C) * ccw(A, B, D) < 0) and (ccw(C, D, A) * ccw(C, D, B) < 0)
-
-        n = len(road_points)
-        for i in range(n - 1):
-            for j in range(i + 1, n - 1):
-                A = (road_points[i][0], road_points[i][1])
-                B = (road_points[i + 1][0], road_points[i + 1][1])
-                C = (road_points[j][0], road_points[j][1])
-                D = (road_points[j + 1][0], road_points[j + 1][1])
-                if intersect(A, B, C, D):
-                    return False  # Self-intersection detected
+        if has_self_intersection(road_points, strict=True):
+            return False  # Self-intersection detected
 
         return True
 
 
+class FrenetRoadBuilder:
+    """
+    Builds a road in Frenet coordinates one curvature value at a time.
+    The pose and the already accepted road points are kept between the steps,
+    so that only the newly added segment has to be validated.
+    """
+
+    def __init__(self, map_size, ds, max_curvature=0.2):
+        self.map_size = map_size
+        self.ds = ds
+        self.max_curvature = max_curvature
+        self.x, self.y, self.theta = map_size / 2, map_size / 2, 0.0  # Initial position
+        self.points = np.zeros((0, 2))
+        self.headings = []
+        self.grid = SegmentGrid(ds)
+
+    def extend(self, kappa):
+        """
+        Moves one step along the road, as FrenetMap.generate_road does for one curvature value,
+        and accepts the new point only if the road stays valid.
+        :param kappa: Curvature applied after the new point
+        :return: Boolean indicating if the point was added to the road
+        """
+        x = self.x + self.ds * np.cos(self.theta)
+        y = self.y + self.ds * np.sin(self.theta)
+        point = np.array([x, y])
+
+        if not self.is_valid_extension(point):
+            return False
+
+        if len(self.points):
+            self.grid.add(self.points[-1], point)
+        self.points = np.vstack((self.points, point))
+        self.headings.append(self.theta)
+        self.x, self.y = x, y
+        self.theta += kappa * self.ds  # 更新方向
+        return True
+
+    def is_valid_extension(self, point):
+        """
+        Checks the segment ending in the new point against the map boundaries,
+        the curvature limit and the earlier segments of the road.
+        :param point: The new road point
+        :return: Boolean indicating if the road stays valid
+        """
+        if not (0 <= point[0] <= self.map_size and 0 <= point[1] <= self.map_size):
+            return False
+
+        n = len(self.points)
+        if n >= 2:
+            # curvature at the last accepted point
+            turn = self.theta - self.headings[-1]
+            if abs(turn) / self.ds > self.max_curvature:
+                return False
+
+        if n >= 1 and self.grid.intersects(self.points[-1], point):
+            return False
+
+        return True
+
+    def road_points(self):
+        """
+        :return: List of the accepted road points in Cartesian coordinates
+        """
+        return [(p[0], p[1], theta) for p, theta in zip(self.points, self.headings)]
@@ -0,0 +1,135 @@
+'''
+Module for evaluating the individuals in a pool of worker processes.
+'''
+import itertools
+import multiprocessing
+import logging as log
+
+import numpy as np
+
+import config as cf
+from ambiegen.solutions import VehicleSolution
+from ambiegen.solutions.genome import stack_genomes, unstack_genomes
+from ambiegen.utils.calc_novelty import calc_population_novelty, get_best_scenarios
+from ambiegen.utils.fitness_cache import get_fitness_cache, set_fitness_cache
+
+
+def init_worker(vehicle_env, cache_path=None):
+    """
+    It is executed once in every worker process when the pool is started.
+    The configuration of the main process is copied to the worker, so that the workers
+    evaluate the roads with the same settings even when the processes are spawned.
+
+    Args:
+      vehicle_env: the vehicle environment configuration of the main process
+      cache_path: the path of the fitness cache shared with the main process, None to disable it
+    """
+    cf.vehicle_env.update(vehicle_env)
+    set_fitness_cache(cache_path)
+
+
+def evaluate_block(block, lengths, best_scenarios):
+    """
+    It evaluates a chunk of test cases in a worker process and returns only the compact results
+    instead of the whole VehicleSolution objects. The states of the chunk are sent as one block.
+
+    Args:
+      block: the states of the test cases, as an array of shape (n, capacity, 3)
+      lengths: the number of states of every test case
+      best_scenarios: the states of the best test cases of the population, used for the novelty.
+    None if the novelty is not needed
+
+    Returns:
+      A list with the fitness, novelty, the number of states kept, the road points and the outcome of the
+    simulation of every test case, and the number of hits and misses of the fitness cache of the worker
+    for the chunk.
+    """
+    cache = get_fitness_cache()
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    results = []
+    for genome in unstack_genomes(block, lengths):
+        s = VehicleSolution()
+        s.states = genome
+        fitness = s.eval_fitness()
+        novelty = 0
+        if best_scenarios is not None:
+            novelty = calc_population_novelty(s.states, best_scenarios, fitness)
+        results.append((fitness, novelty, len(s.states), s.road_points, s.outcome))
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return results, hits, misses
+
+
+class ProcessPoolEvaluation:
+    """
+    Elementwise runner for pymoo problems that spreads the evaluation of the individuals
+    over a pool of long-lived worker processes.
+    The states are sent to the workers in blocks, and the workers return the fitness, novelty,
+    number of valid states, road points and simulation outcome, which are then stored back in the individuals
+    of the main process.
+    The individuals that are already evaluated are not sent to the workers.
+    """
+
+    def __init__(self, n_workers, cache_path=None):
+        self.n_workers = n_workers
+        self.pool = multiprocessing.Pool(
+            n_workers, initializer=init_worker, initargs=(dict(cf.vehicle_env), cache_path)
+        )
+        log.info("Started a pool of %d evaluation workers", n_workers)
+
+    def __call__(self, f, X):
+        problem = f.problem
+        best_scenarios = None
+        if problem.n_obj > 1:
+            best_scenarios = get_best_scenarios(f.kwargs["algorithm"])
+
+        # the individuals whose states were not changed since their last evaluation keep their results
+        evaluated = [x[0].is_evaluated for x in X]
+        pending = [x[0] for x, done in zip(X, evaluated) if not done]
+
+        # the individuals are split in contiguous chunks, the states of every chunk are sent as one block
+        n_chunks = min(len(pending), self.n_workers * 4)
+        bounds = np.linspace(0, len(pending), n_chunks + 1).astype(int)
+        jobs = [
+            stack_genomes([s.states for s in pending[start:end]]) + (best_scenarios,)
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        blocks = self.pool.starmap(evaluate_block, jobs)
+        results = itertools.chain.from_iterable(results for results, _, _ in blocks)
+
+        # the lookups are done by the caches of the workers, they are counted in the cache of the main process
+        cache = get_fitness_cache()
+        if cache is not None:
+            cache.hits += sum(hits for _, hits, _ in blocks)
+            cache.misses += sum(misses for _, _, misses in blocks)
+
+        for s, (fitness, novelty, n_states, road_points, outcome) in zip(pending, results):
+            s.fitness = fitness
+            s.outcome = outcome
+            s.novelty = novelty
+            s.states = s.states[:n_states]
+            s.road_points = road_points
+            s.mark_evaluated()
+
+        outs = []
+        for x, done in zip(X, evaluated):
+            s = x[0]
+            if done and best_scenarios is not None:
+                s.novelty = calc_population_novelty(s.states, best_scenarios, s.fitness)
+            out = {}
+            problem.fill_out(s, out)
+            outs.append(out)
+        return outs
+
+    def close(self):
+        """
+        It stops the worker processes
+        """
+        self.pool.close()
+        self.pool.join()
+
+    def __getstate__(self):
+        # the pool can not be copied together with the algorithm or sent to other processes
+        state = self.__dict__.copy()
+        state.pop("pool", None)
+        return state
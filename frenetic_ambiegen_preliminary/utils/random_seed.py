@@ -1,4 +1,5 @@
 import time
+import numpy as np
 import logging as log
 
 def get_random_seed():
@@ -19,3 +20,21 @@ def get_random_seed():
 
 
     return seed
+
+
+def get_run_seeds(random_seed, runs_number):
+    """
+    It derives an independent seed for every run from one numpy SeedSequence, so that the runs
+    executed in parallel do not share their random streams and the whole experiment can be
+    repeated from the entropy of the sequence
+
+    Args:
+      random_seed: the entropy of the seed sequence, None to draw it from the operating system
+      runs_number: the number of runs
+
+    Returns:
+      The list of the seeds of the runs.
+    """
+    seed_sequence = np.random.SeedSequence(random_seed)
+    log.info("Seed sequence entropy: %s", seed_sequence.entropy)
+    return [int(child.generate_state(1)[0]) for child in seed_sequence.spawn(runs_number)]
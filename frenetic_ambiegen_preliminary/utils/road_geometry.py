@@ -0,0 +1,96 @@
+import numpy as np
+from scipy.interpolate import splprep, splev
+from shapely.geometry import LineString
+
+from ambiegen.utils import curvature as kernels
+
+
+class RoadGeometry:
+    """
+    This class fits a spline through the road points once and keeps it.
+    The dense samples of the road, their curvature, bounding box and simplicity
+    are computed lazily from the same fit and cached per sampling distance,
+    so that the validity check, the evaluation and the rendering of a road share one fit.
+    """
+
+    def __init__(self, road_points, min_num_nodes=20):
+        self.road_points = np.array([[p[0], p[1]] for p in road_points], dtype=float)
+        self.min_num_nodes = min_num_nodes
+
+        assert len(self.road_points) >= 2, "You need at leas two road points to define a road"
+
+        self.length = float(np.sum(np.hypot(*np.diff(self.road_points, axis=0).T)))
+
+        if len(self.road_points) == 2:
+            # With two points the only option is a straight segment
+            k = 1
+        elif len(self.road_points) == 3:
+            # With three points we use an arc, using linear interpolation will result in invalid road tests
+            k = 2
+        else:
+            # Otheriwse, use cubic splines
+            k = 3
+        self.tck, _ = splprep([self.road_points[:, 0], self.road_points[:, 1]], s=0, k=k)
+
+        self._samples = {}
+        self._simple = {}
+
+    def samples(self, spacing=1, decimals=None):
+        """
+        It evaluates the spline at points that are approximately spacing meters apart
+
+        Args:
+          spacing: the distance between the samples. Defaults to 1
+          decimals: the number of decimals to round the samples to, None to keep full precision
+
+        Returns:
+          An array of shape (n, 2) with the samples. None as spacing returns the road points.
+        """
+        if spacing is None:
+            return self.road_points
+        key = (spacing, decimals)
+        if key not in self._samples:
+            num_nodes = max(int(self.length), self.min_num_nodes)
+            step_size = 1 / num_nodes * spacing
+            unew = np.arange(0, 1 + step_size, step_size)
+            points = np.column_stack(splev(unew, self.tck))
+            if decimals is not None:
+                points = np.round(points, decimals)
+            self._samples[key] = points
+        return self._samples[key]
+
+    def curvature(self, spacing=1, decimals=None):
+        """
+        Derivative based curvature of the samples
+
+        Returns:
+          An array with the signed curvature at every sample.
+        """
+        return kernels.curvature(self.samples(spacing, decimals))
+
+    def bounding_box(self, spacing=None):
+        """
+        Returns:
+          The (min_x, min_y, max_x, max_y) bounding box of the samples.
+        """
+        points = self.samples(spacing)
+        min_x, min_y = points.min(axis=0)
+        max_x, max_y = points.max(axis=0)
+        return min_x, min_y, max_x, max_y
+
+    def is_inside(self, map_size, spacing=None):
+        """
+        Returns:
+          True if all the samples are within the map boundaries.
+        """
+        min_x, min_y, max_x, max_y = self.bounding_box(spacing)
+        return bool(min_x >= 0 and min_y >= 0 and max_x <= map_size and max_y <= map_size)
+
+    def is_simple(self, spacing=None):
+        """
+        Returns:
+          True if the polyline through the samples does not intersect itself.
+        """
+        if spacing not in self._simple:
+            self._simple[spacing] = LineString(self.samples(spacing)).is_simple
+        return self._simple[spacing]
@@ -7,6 +7,8 @@ from numpy.ma import arange
 #import config as cf
 from shapely.geometry import LineString
 import config as cf
+from ambiegen.utils.road_geometry import RoadGeometry
+from ambiegen.utils import curvature as kernels
 
 rounding_precision = 3
 interpolation_distance = 1
@@ -58,13 +60,7 @@ def calculate_curvature(x, y):
     :param y: y坐标列表
     :return: 曲率列表
     """
-    dx = np.gradient(x)
-    dy = np.gradient(y)
-    ddx = np.gradient(dx)
-    ddy = np.gradient(dy)
-    curvature = (dx * ddy - dy * ddx) / (dx**2 + dy**2)**1.5
-    # print(curvature)
-    return curvature
+    return kernels.curvature(np.column_stack((x, y)))
 
 def is_too_sharp(the_test, max_curvature=0.2):
     """
@@ -73,67 +69,39 @@ def is_too_sharp(the_test, max_curvature=0.2):
     :param max_curvature: 最大允许曲率
     :return: True 如果存在急弯，否则 False
     """
-    x = [p[0] for p in the_test]
-    y = [p[1] for p in the_test]
-    curvature = calculate_curvature(x, y)
+    curvature = kernels.curvature(np.asarray(the_test)[:, :2])
     return np.max(np.abs(curvature)) < max_curvature
 
 
-def is_valid_road(points):
+def is_valid_road(points, spacing=None):
     """
     If the road is not simple, or if the road is too sharp, or if the road has less than 3 points, or if
     the last point is not in range, then the road is invalid
 
     Args:
-      points: a list of points that make up the road
+      points: a list of points that make up the road, or the RoadGeometry of the road
+      spacing: the sampling distance of the RoadGeometry that is checked, None to check the road points
 
     Returns:
       A boolean value.
     """
 
-    in_range = is_inside_map(points, cf.vehicle_env["map_size"])
-    the_test = interpolate_test(points)
+    geometry = points if isinstance(points, RoadGeometry) else RoadGeometry(points, min_num_nodes)
+    nodes = geometry.samples(spacing)
+
+    in_range = geometry.is_inside(cf.vehicle_env["map_size"], spacing)
+    the_test = geometry.samples(interpolation_distance, rounding_precision)
 
-    road = LineString([(t[0], t[1]) for t in points])
     invalid = (
-        (road.is_simple is False)
+        (geometry.is_simple(spacing) is False)
        # or (is_too_sharp(points) is True)
         or (in_range is False)
         or (is_too_sharp(the_test) is True)
-        or (len(points) < 3)
+        or (len(nodes) < 3)
     )
     return not(invalid)
 
 # some of this code was taken from https://github.com/se2p/tool-competition-av
-def find_circle(p1, p2, p3):
-    """
-    The function takes three points and returns the radius of the circle that passes through them
-
-    Args:
-      p1: the first point
-      p2: the point that is the center of the circle
-      p3: the point that is the furthest away from the line
-
-    Returns:
-      The radius of the circle.
-    """
-    temp = p2[0] * p2[0] + p2[1] * p2[1]
-    bc = (p1[0] * p1[0] + p1[1] * p1[1] - temp) / 2
-    cd = (temp - p3[0] * p3[0] - p3[1] * p3[1]) / 2
-    det = (p1[0] - p2[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (p1[1] - p2[1])
-
-    if abs(det) < 1.0e-6:
-        return np.inf
-
-    # Center of circle
-    cx = (bc * (p2[1] - p3[1]) - cd * (p1[1] - p2[1])) / det
-    cy = ((p1[0] - p2[0]) * cd - (p2[0] - p3[0]) * bc) / det
-
-    radius = np.sqrt((cx - p1[0]) ** 2 + (cy - p1[1]) ** 2)
-    # print(radius)
-    return radius
-
-
 def min_radius(x, w=5):
     """
     It takes a list of points (x) and a window size (w) and returns the minimum radius of curvature of
@@ -146,19 +114,7 @@ def min_radius(x, w=5):
     Returns:
       The minimum radius of curvature of the road.
     """
-    mr = np.inf
-    nodes = x
-    for i in range(len(nodes) - w):
-        p1 = nodes[i]
-        p2 = nodes[i + int((w - 1) / 2)]
-        p3 = nodes[i + (w - 1)]
-        radius = find_circle(p1, p2, p3)
-        if radius < mr:
-            mr = radius
-    if mr == np.inf:
-        mr = 0
-
-    return mr * 3.280839895  # , mincurv
+    return kernels.min_radius(x, w)
 
 
 def is_inside_map(points, map_size):
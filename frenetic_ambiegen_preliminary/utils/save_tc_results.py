@@ -25,10 +25,8 @@ def save_tc_results(tc_stats, tcs, tcs_convergence, algo):
     stats_path = dt_string + "_" + cf.files["stats_path"] + "_" + algo
     tcs_path = dt_string + "_" + cf.files["tcs_path"] + "_" + algo
 
-    if not os.path.exists(stats_path):
-        os.makedirs(stats_path)
-    if not os.path.exists(tcs_path):
-        os.makedirs(tcs_path)
+    os.makedirs(stats_path, exist_ok=True)
+    os.makedirs(tcs_path, exist_ok=True)
 
     with open(
         os.path.join(stats_path, dt_string + "-stats.json"), "w"
@@ -23,10 +23,8 @@ def save_tcs_images(test_suite, problem, run, algo):
     dt_string = now.strftime("%d-%m-%Y")
     images_path = dt_string + "_" + cf.files["images_path"] +  "_" + algo
 
-    if not os.path.exists(images_path):
-        os.makedirs(images_path)
-    if not os.path.exists(os.path.join(images_path, "run" + str(run))):
-        os.makedirs(os.path.join(images_path, "run" + str(run)))
+    # the runs scheduled on parallel processes can create the folders at the same time
+    os.makedirs(os.path.join(images_path, "run" + str(run)), exist_ok=True)
 
     for i in range(len(test_suite)):
 
@@ -0,0 +1,217 @@
+'''
+Module for detecting self-intersections of roads with a uniform grid of segments.
+'''
+import math
+from collections import defaultdict
+
+import numpy as np
+from shapely.geometry import LineString
+
+
+def _orientation(a, b, c):
+    """
+    Returns the sign of the cross product (b - a) x (c - a) for arrays of points
+    """
+    return np.sign((b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (c[..., 0] - a[..., 0]))
+
+
+def _on_segment(a, b, c):
+    """
+    Checks whether the point c, collinear with the segment ab, lies on the segment
+    """
+    return (
+        (np.minimum(a[..., 0], b[..., 0]) <= c[..., 0]) & (c[..., 0] <= np.maximum(a[..., 0], b[..., 0]))
+        & (np.minimum(a[..., 1], b[..., 1]) <= c[..., 1]) & (c[..., 1] <= np.maximum(a[..., 1], b[..., 1]))
+    )
+
+
+def segments_intersect(a, b, starts, ends, strict=False):
+    """
+    Checks the segment ab against an array of segments.
+
+    :param a: start point of the segment
+    :param b: end point of the segment
+    :param starts: array (n, 2) with the start points of the other segments
+    :param ends: array (n, 2) with the end points of the other segments
+    :param strict: if True only proper crossings are reported, otherwise touching segments intersect too
+    :return: Boolean array indicating which of the segments intersect ab
+    """
+    a = np.broadcast_to(a, starts.shape)
+    b = np.broadcast_to(b, starts.shape)
+    d1 = _orientation(starts, ends, a)
+    d2 = _orientation(starts, ends, b)
+    d3 = _orientation(a, b, starts)
+    d4 = _orientation(a, b, ends)
+    hit = (d1 * d2 < 0) & (d3 * d4 < 0)
+    if not strict:
+        hit |= (d1 == 0) & _on_segment(starts, ends, a)
+        hit |= (d2 == 0) & _on_segment(starts, ends, b)
+        hit |= (d3 == 0) & _on_segment(a, b, starts)
+        hit |= (d4 == 0) & _on_segment(a, b, ends)
+    return hit
+
+
+class SegmentGrid:
+    """
+    Uniform grid over the segments of a road.
+    Every segment is registered in the cells covered by its bounding box, so a new segment is only
+    compared with the segments that are close to it. Segments are added one at a time,
+    which allows to check a road incrementally while it is being built.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.starts = []
+        self.ends = []
+
+    def _cells(self, a, b):
+        x0 = math.floor(min(a[0], b[0]) / self.cell_size)
+        x1 = math.floor(max(a[0], b[0]) / self.cell_size)
+        y0 = math.floor(min(a[1], b[1]) / self.cell_size)
+        y1 = math.floor(max(a[1], b[1]) / self.cell_size)
+        return [(i, j) for i in range(x0, x1 + 1) for j in range(y0, y1 + 1)]
+
+    def intersects(self, a, b, strict=False):
+        """
+        Checks the segment ab against the segments already in the grid. The segment is expected to
+        continue the road, so the last segment, that shares the point a, only counts if it overlaps ab.
+
+        :param a: start point of the new segment
+        :param b: end point of the new segment
+        :param strict: if True only proper crossings are reported
+        :return: Boolean indicating if the new segment intersects the road
+        """
+        n = len(self.starts)
+        if n == 0:
+            return False
+
+        candidates = set()
+        for cell in self._cells(a, b):
+            candidates.update(self.cells.get(cell, ()))
+        candidates.discard(n - 1)
+
+        if candidates:
+            idx = np.fromiter(candidates, dtype=int, count=len(candidates))
+            starts = np.array([self.starts[i] for i in idx])
+            ends = np.array([self.ends[i] for i in idx])
+            if segments_intersect(np.asarray(a, dtype=float), np.asarray(b, dtype=float), starts, ends, strict).any():
+                return True
+
+        if not strict:
+            # the previous segment may only share the common point with the new one
+            p0 = np.asarray(self.starts[-1], dtype=float)
+            p1 = np.asarray(a, dtype=float)
+            p2 = np.asarray(b, dtype=float)
+            if _orientation(p0, p1, p2) == 0 and (_on_segment(p0, p1, p2) or _on_segment(p1, p2, p0)):
+                return True
+        return False
+
+    def add(self, a, b):
+        """
+        Adds the segment ab to the grid
+        """
+        index = len(self.starts)
+        self.starts.append((float(a[0]), float(a[1])))
+        self.ends.append((float(b[0]), float(b[1])))
+        for cell in self._cells(a, b):
+            self.cells[cell].append(index)
+
+
+def find_self_intersections(roads, cell_size=None, strict=False):
+    """
+    Checks a batch of roads for self-intersections. The segments of all the roads are put in one
+    uniform grid at once, and only the pairs of segments of the same road that share a grid cell
+    are tested exactly, so the check does not compare every pair of segments.
+
+    :param roads: a list of roads, each road is a list or array of (x, y) points
+    :param cell_size: the size of the grid cells, by default the average segment length
+    :param strict: if True only proper crossings are reported, otherwise touching segments intersect too
+    :return: Boolean array indicating which roads intersect themselves
+    """
+    roads = [np.array([[p[0], p[1]] for p in road], dtype=float).reshape(-1, 2) for road in roads]
+    result = np.zeros(len(roads), dtype=bool)
+    counts = np.array([max(len(road) - 1, 0) for road in roads], dtype=int)
+    total = counts.sum()
+    if total == 0:
+        return result
+
+    starts = np.concatenate([road[:-1] for road in roads if len(road) > 1])
+    ends = np.concatenate([road[1:] for road in roads if len(road) > 1])
+    road_id = np.repeat(np.arange(len(roads)), counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)  # index of the first segment of the road
+
+    if cell_size is None:
+        cell_size = float(np.hypot(*(ends - starts).T).mean()) or 1.0
+
+    # register every segment in all the cells covered by its bounding box
+    low = np.floor(np.minimum(starts, ends) / cell_size).astype(np.int64)
+    high = np.floor(np.maximum(starts, ends) / cell_size).astype(np.int64)
+    nx = high[:, 0] - low[:, 0] + 1
+    ny = high[:, 1] - low[:, 1] + 1
+    n_cells = nx * ny
+    seg = np.repeat(np.arange(total), n_cells)
+    local = np.arange(n_cells.sum()) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+    cx = low[seg, 0] + local // ny[seg]
+    cy = low[seg, 1] + local % ny[seg]
+
+    order = np.lexsort((seg, cy, cx, road_id[seg]))
+    seg, cx, cy = seg[order], cx[order], cy[order]
+    rid = road_id[seg]
+
+    # candidate pairs are the segments that share a cell
+    pairs = []
+    k = 1
+    while k < len(seg):
+        same = (rid[k:] == rid[:-k]) & (cx[k:] == cx[:-k]) & (cy[k:] == cy[:-k])
+        if not same.any():
+            break
+        pairs.append(np.column_stack((seg[:-k][same], seg[k:][same])))
+        k += 1
+
+    if pairs:
+        pairs = np.unique(np.concatenate(pairs), axis=0)
+        pairs = pairs[pairs[:, 1] > pairs[:, 0] + 1]  # neighbouring segments share a point
+        hits = segments_intersect(starts[pairs[:, 0]], ends[pairs[:, 0]], starts[pairs[:, 1]], ends[pairs[:, 1]], strict)
+        result[road_id[pairs[hits, 0]]] = True
+
+    if not strict:
+        # neighbouring segments may only share their common point
+        prev = np.arange(total - 1)
+        prev = prev[first[prev + 1] == first[prev]]
+        p0, p1, p2 = starts[prev], ends[prev], ends[prev + 1]
+        overlap = (_orientation(p0, p1, p2) == 0) & (_on_segment(p0, p1, p2) | _on_segment(p1, p2, p0))
+        result[road_id[prev[overlap]]] = True
+
+    return result
+
+
+def has_self_intersection(points, cell_size=None, strict=False):
+    """
+    Checks if the polyline through the points intersects itself
+
+    :param points: list or array of (x, y) road points
+    :param cell_size: the size of the grid cells, by default the average segment length
+    :param strict: if True only proper crossings are reported, otherwise touching segments intersect too
+    :return: Boolean indicating if the road intersects itself
+    """
+    return bool(find_self_intersections([points], cell_size, strict)[0])
+
+
+def is_simple_path(points):
+    """
+    Checks if the polyline through the points does not intersect itself, with the same result as the
+    is_simple property of a shapely LineString. A polyline whose x or y coordinates strictly increase or
+    decrease can not intersect itself, so only the other ones are checked with shapely. For the car
+    paths, shapely is faster than find_self_intersections, even when it is called on a whole batch.
+
+    :param points: array (n, 2) of points
+    :return: Boolean indicating if the polyline is simple
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) < 2:
+        return True
+    delta = np.diff(points, axis=0)
+    if ((delta > 0).all(axis=0) | (delta < 0).all(axis=0)).any():
+        return True
+    return bool(LineString(points).is_simple)
@@ -6,6 +6,7 @@ from shapely.geometry import LineString, Point
 from numpy.ma import arange
 
 import config as cf
+from ambiegen.utils import curvature as kernels
 
 
 class Car:
@@ -313,35 +314,6 @@ def is_invalid_road(points):
     return invalid
 
 # some of this code was taken from https://github.com/se2p/tool-competition-av
-def find_circle(p1, p2, p3):
-    """
-    The function takes three points and returns the radius of the circle that passes through them
-
-    Args:
-      p1: the first point
-      p2: the point that is the center of the circle
-      p3: the point that is the furthest away from the line
-
-    Returns:
-      The radius of the circle.
-    """
-    temp = p2[0] * p2[0] + p2[1] * p2[1]
-    bc = (p1[0] * p1[0] + p1[1] * p1[1] - temp) / 2
-    cd = (temp - p3[0] * p3[0] - p3[1] * p3[1]) / 2
-    det = (p1[0] - p2[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (p1[1] - p2[1])
-
-    if abs(det) < 1.0e-6:
-        return np.inf
-
-    # Center of circle
-    cx = (bc * (p2[1] - p3[1]) - cd * (p1[1] - p2[1])) / det
-    cy = ((p1[0] - p2[0]) * cd - (p2[0] - p3[0]) * bc) / det
-
-    radius = np.sqrt((cx - p1[0]) ** 2 + (cy - p1[1]) ** 2)
-    # print(radius)
-    return radius
-
-
 def min_radius(x, w=5):
     """
     It takes a list of points (x) and a window size (w) and returns the minimum radius of curvature of
@@ -354,19 +326,7 @@ def min_radius(x, w=5):
     Returns:
       The minimum radius of curvature of the road.
     """
-    mr = np.inf
-    nodes = x
-    for i in range(len(nodes) - w):
-        p1 = nodes[i]
-        p2 = nodes[i + int((w - 1) / 2)]
-        p3 = nodes[i + (w - 1)]
-        radius = find_circle(p1, p2, p3)
-        if radius < mr:
-            mr = radius
-    if mr == np.inf:
-        mr = 0
-
-    return mr * 3.280839895  # , mincurv
+    return kernels.min_radius(x, w)
 
 
 def _interpolate(the_test):
@@ -1,6 +1,7 @@
 
-from scipy.interpolate import splprep, splev
-from numpy.ma import arange
+import logging as log
+
+import numpy as np
 import matplotlib.pyplot as plt 
 from shapely.geometry import LineString
 from descartes import PolygonPatch
@@ -8,48 +9,37 @@ from descartes import PolygonPatch
 from ambiegen.utils.lane_controller import LaneController
 from ambiegen.utils.kinematic_model import KinematicModel
 from ambiegen.utils.road_validity_check import is_valid_road
+from ambiegen.utils.road_geometry import RoadGeometry
+from ambiegen.utils.segment_index import is_simple_path
+import config as cf
 
 #from simulator.code_pipeline.tests_generation import RoadTestFactory
 #from simulator.code_pipeline.validation import TestValidator
 
+waypoint_spacing = 5
+
+# the outcomes of the simulation of a road
+OUTCOME_INVALID = "invalid"  # the road is not valid and was not simulated
+OUTCOME_COMPLETED = "completed"  # the vehicle reached the end of the road
+OUTCOME_MAX_STEPS = "max_steps"  # the simulation was stopped after max_steps steps
+OUTCOME_DEVIATION = "deviation"  # the simulation was stopped when the deviation exceeded stop_deviation
+
+
 def interpolate_road(road):
     """
     It takes a list of points (road) and returns a list of points (nodes) that are evenly spaced
     along the road
 
     Args:
-        road: a list of tuples, each tuple is a point on the road
+        road: a list of tuples, each tuple is a point on the road, or the RoadGeometry of the road
 
     Returns:
         A list of tuples.
     """
 
-    test_road = LineString([(t[0], t[1]) for t in road])
-
-    length = test_road.length
-
-    num_nodes = int(length)
-    if num_nodes < 20:
-        num_nodes = 20
-
-    old_x_vals = [t[0] for t in road]
-    old_y_vals = [t[1] for t in road]
-
-    if len(old_x_vals) == 2:
-        k = 1
-    elif len(old_x_vals) == 3:
-        k = 2
-    else:
-        k = 3
-    f2, u = splprep([old_x_vals, old_y_vals], s=0, k=k)
-
-    step_size = 1 / num_nodes *5
-
-    xnew = arange(0, 1 + step_size, step_size)
-
-    x2, y2 = splev(xnew, f2)
+    geometry = road if isinstance(road, RoadGeometry) else RoadGeometry(road)
 
-    nodes = list(zip(x2, y2))
+    nodes = [tuple(p) for p in geometry.samples(waypoint_spacing)]
 
     return nodes
 
@@ -100,22 +90,32 @@ def evaluate_scenario(points):
     """
     The function evaluates a scenario by simulating a vehicle's path along a set of waypoints and
     returns the negative fitness value and the path coordinates.
+    The simulation is stopped after cf.vehicle_env["max_steps"] steps, and, if cf.vehicle_env["stop_deviation"]
+    is set, as soon as the distance of the vehicle from the road exceeds it.
+    The path of the vehicle and its distances from the road are written into buffers preallocated
+    from the length of the road.
     
     Args:
       points: a list of tuples representing the waypoints of a road, where each tuple contains the x and
-    y coordinates of a waypoint.
+    y coordinates of a waypoint, or the RoadGeometry of the road, which is then sampled to get the waypoints.
     
     Returns:
-      The function `evaluate_scenario` returns a tuple containing the fitness value and a list of x and
-    y coordinates of the vehicle's path. The fitness value is the negative of the maximum distance
-    traveled by the vehicle on a valid road scenario.
+      The function `evaluate_scenario` returns a tuple containing the fitness value, the x and y
+    coordinates of the vehicle's path, as views of the path buffer, and the outcome of the simulation.
+    The fitness value is the negative of the maximum distance traveled by the vehicle on a valid road scenario.
     """
 
-    tot_x = []
-    tot_y = []
+    path = np.empty((0, 2))
+    count = 0
     
 
-    if is_valid_road(points):
+    if isinstance(points, RoadGeometry):
+        valid = is_valid_road(points, waypoint_spacing)
+        points = interpolate_road(points)
+    else:
+        valid = is_valid_road(points)
+
+    if valid:
     #if is_valid:
 
         init_pos = points[0]
@@ -127,38 +127,58 @@ def evaluate_scenario(points):
         vehicle = KinematicModel(x0, y0, yaw0, speed0)
         controller = LaneController(waypoints, speed0)
         done = False
-        distance_list = [0]
         steering = 0
-        count = 0
         dt = 0.7
+        max_steps = max(cf.vehicle_env["max_steps"], 1)
+        stop_deviation = cf.vehicle_env["stop_deviation"]
+        outcome = OUTCOME_COMPLETED
+
+        # the vehicle drives at least min_speed, the buffers grow only if it leaves the road
+        capacity = min(max_steps, int(controller.length / (controller.min_speed * dt)) + 8)
+        path = np.empty((capacity, 2))
+        distances = np.empty(capacity)
         while not(done):
             x, y, yaw, speed = vehicle.x, vehicle.y, vehicle.yaw, vehicle.speed
             steering, speed, distance, done = controller.control(x, y, yaw, speed)
             vehicle.update(steering, 0.1, dt, speed)  #accel = 0.05, v0 = 12
-            tot_x.append(vehicle.x)
-            tot_y.append(vehicle.y)
+            if count == len(path):
+                capacity = min(2 * len(path), max_steps)
+                path = np.concatenate((path, np.empty((capacity - len(path), 2))))
+                distances = np.concatenate((distances, np.empty(capacity - len(distances))))
+            path[count] = vehicle.x, vehicle.y
+            distances[count] = distance
             count += 1
-            if count > 7:
-                #if distance < 7.5:
-                distance_list.append(distance)
+            if stop_deviation is not None and count > 7 and not done and distance > stop_deviation:
+                outcome = OUTCOME_DEVIATION
+                break
 
-            #build_tc(points, [tot_x, tot_y], max(distance_list))
+            if not done and count >= max_steps:
+                log.warning("The simulation of the road was stopped after %d steps", count)
+                outcome = OUTCOME_MAX_STEPS
+                break
 
-        car_path = LineString(zip(tot_x, tot_y))
-        if car_path.is_simple is False:
+            #build_tc(points, [path[:count, 0], path[:count, 1]], max(distances[7:count]))
+
+        # the distances are recorded after the first 7 steps
+        distance_list = [0] + distances[7:count].tolist()
+        if is_simple_path(path[:count]) is False:
             distance_list2 = [min(3, i) for i in distance_list]
         else:
             distance_list2 = distance_list
 
 
-        if (distance_list[:-1]):
+        if outcome == OUTCOME_DEVIATION:
+            # the deviation that stopped the simulation is part of the fitness
+            fitness = max(distance_list2)
+        elif (distance_list[:-1]):
             fitness = max(distance_list2[:-1])
         else:
             fitness = max(distance_list2)
 
     else: 
         fitness = 0
+        outcome = OUTCOME_INVALID
 
 
-    return -fitness, [tot_x[:-1], tot_y[:-1]]
+    return -fitness, [path[:count - 1, 0], path[:count - 1, 1]], outcome
    
\ No newline at end of file
@@ -1,5 +1,7 @@
 from pymoo.model.duplicate import ElementwiseDuplicateElimination
 
+from frenet_ambiegen.Solution import states_key
+
 
 class MyDuplicateElimination(ElementwiseDuplicateElimination):
     '''
@@ -7,3 +9,20 @@ class MyDuplicateElimination(ElementwiseDuplicateElimination):
     '''
     def is_equal(self, a, b):
         return a.X[0].states == b.X[0].states  # remove individuals that are the same
+
+    def _do(self, pop, other, is_duplicate):
+        # the individuals are bucketed by the hash of their states instead of being compared pairwise
+        keys = [states_key(x[0].states) for x in pop.get("X")]
+        if other is None:
+            # as in the pairwise comparison, an individual is a duplicate if the same states come later
+            seen = set()
+            for i in reversed(range(len(keys))):
+                if keys[i] in seen:
+                    is_duplicate[i] = True
+                seen.add(keys[i])
+        else:
+            seen = set(states_key(x[0].states) for x in other.get("X"))
+            for i, key in enumerate(keys):
+                if key in seen:
+                    is_duplicate[i] = True
+        return is_duplicate
@@ -1,6 +1,7 @@
 import logging
 
 from pymoo.model.problem import Problem
+import frenet_ambiegen.config as cf
 
 
 class MyProblem(Problem):
@@ -12,8 +13,13 @@ class MyProblem(Problem):
 
     def _evaluate(self, x, out, *args, **kwargs):
         s = x[0]
-        s.get_points()  # transform the states into actual points (mutation and crossover operations are performed on states)
-        s.remove_invalid_cases()
-        s.eval_fitness()
-        out["F"] = [s.fitness, s.novelty]
-        out["G"] = 4 - s.fitness * (-1)
+        if not s.is_evaluated:  # the individuals not changed by the operators keep their fitness
+            s.get_points()  # transform the states into actual points (mutation and crossover operations are performed on states)
+            s.remove_invalid_cases()
+            s.eval_fitness()
+        fitness = s.fitness
+        if s.failed_in_simulator:
+            # the roads that failed in the simulator are preferred to the ones that only fail in the model
+            fitness -= cf.ga["fail_bonus"]
+        out["F"] = [fitness, s.novelty]
+        out["G"] = 4 - fitness * (-1)
@@ -23,3 +23,23 @@ class MyTcSampling(Sampling):
             s.states = states
             X[i, 0] = s
         return X
+
+
+class MyTcWarmSampling(Sampling):
+
+    '''
+    Module to generate the initial population from the solutions of a previous run,
+    completed with new roads
+    '''
+    def __init__(self, seeds):
+        super().__init__()
+        self.seeds = seeds
+
+    def _do(self, problem, n_samples, **kwargs):
+        seeds = self.seeds[:n_samples]
+        X = np.full((n_samples, 1), None, dtype=np.object)
+        for i, s in enumerate(seeds):
+            X[i, 0] = s
+        if len(seeds) < n_samples:
+            X[len(seeds):] = MyTcSampling()._do(problem, n_samples - len(seeds), **kwargs)
+        return X
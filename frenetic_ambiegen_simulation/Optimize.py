@@ -1,59 +1,113 @@
-
 from pymoo.optimize import minimize
 
 from frenet_ambiegen.MyProblem import MyProblem
 from frenet_ambiegen.MyTcMutation import MyTcMutation
 from frenet_ambiegen.MyTcCrossOver import MyTcCrossover
 from frenet_ambiegen.MyDuplicates import MyDuplicateElimination
-from frenet_ambiegen.MyTcSampling import MyTcSampling
+from frenet_ambiegen.MyTcSampling import MyTcSampling, MyTcWarmSampling
+from frenet_ambiegen.Solution import states_key
+from frenet_ambiegen.scheduler import Scheduler
 import time
 from pymoo.algorithms.nsga2 import NSGA2
 import frenet_ambiegen.config as cf
 
+
+class Optimizer:
+
+    '''
+    The optimizer is kept between the iterations of the generator. Every run of the algorithm
+    starts from the roads that failed in the simulator and the final population of the previous
+    run, and only the test cases that were not returned before are returned, the most likely
+    to fail per second of simulation first.
+    '''
+
+    def __init__(self):
+        self.population = []  # the final population of the previous run
+        self.failed = {}  # the solutions whose roads failed in the simulator, by states
+        self.returned = set()  # the states of the test cases already returned
+        self.pending = {}  # the returned test cases waiting for their outcome
+        self.n_cases = 0
+        self.scheduler = Scheduler()
+
+    def report(self, case, outcome, duration=None):
+        '''
+        Stores the outcome of the execution of a returned test case in the simulator,
+        the duration is None if the test case was not executed
+        '''
+        s = self.pending.pop(case, None)
+        if s is None:
+            return
+        s.set_simulator_outcome(outcome)
+        self.scheduler.observe(s.fitness, s.intp_points, outcome, duration)
+        if outcome == "FAIL":
+            self.failed[states_key(s.states)] = s
+
+    def optimize(self):
+
+        '''
+        In this function the algorithm is launched and
+        the new Pareto optimal solutions are returned
+        '''
+
+        seeds = list(self.failed.values())
+        seeds += [s for s in self.population if states_key(s.states) not in self.failed]
+        # a warm started run needs less generations
+        n_gen = cf.ga["warm_n_gen"] if seeds else cf.ga["n_gen"]
+
+        algorithm = NSGA2(
+            n_offsprings=50,
+            pop_size=cf.ga["population"],
+            sampling=MyTcWarmSampling(seeds) if seeds else MyTcSampling(),
+            crossover=MyTcCrossover(cf.ga["cross_rate"]),
+            mutation=MyTcMutation(cf.ga["mut_rate"]),
+            eliminate_duplicates=MyDuplicateElimination(),
+        )
+
+        t = int(time.time() * 1000)
+        seed = (
+            ((t & 0xFF000000) >> 24)
+            + ((t & 0x00FF0000) >> 8)
+            + ((t & 0x0000FF00) << 8)
+            + ((t & 0x000000FF) << 24)
+        )
+
+        res = minimize(
+            MyProblem(),
+            algorithm,
+            ("n_gen", n_gen),
+            seed=seed,
+            verbose=False,
+            eliminate_duplicates=True,
+        )
+
+        print("Best solution found222: \nF = %s" % (res.F))
+        self.population = [x[0] for x in res.pop.get("X")]
+        results = []
+        i = 0
+
+        while i < len(res.F):
+            result = self.population[i]
+            i += 1
+
+            key = states_key(result.states)
+            if key in self.returned:
+                continue
+            self.returned.add(key)
+            results.append(result)
+
+        test_cases = {}
+        for result in self.scheduler.order(results):
+            case = "tc" + str(self.n_cases)
+            self.n_cases += 1
+            self.pending[case] = result
+            test_cases[case] = result.intp_points
+        return test_cases
+
+
 def optimize():
 
     '''
     In this function the algorithm is launched and
     the Pareto optimal solutions are returned
     '''
-
-    algorithm = NSGA2(
-        n_offsprings=50,
-        pop_size=cf.ga["population"],
-        sampling=MyTcSampling(),
-        crossover=MyTcCrossover(cf.ga["cross_rate"]),
-        mutation=MyTcMutation(cf.ga["mut_rate"]),
-        eliminate_duplicates=MyDuplicateElimination(),
-    )
-
-    t = int(time.time() * 1000)
-    seed = (
-        ((t & 0xFF000000) >> 24)
-        + ((t & 0x00FF0000) >> 8)
-        + ((t & 0x0000FF00) << 8)
-        + ((t & 0x000000FF) << 24)
-    )
-
-    res = minimize(
-        MyProblem(),
-        algorithm,
-        ("n_gen", cf.ga["n_gen"]),
-        seed=seed,
-        verbose=False,
-        save_history=True,
-        eliminate_duplicates=True,
-    )
-
-    print("Best solution found222: \nF = %s" % (res.F))
-    gen = len(res.history) - 1
-    test_cases = {}
-    i = 0
-
-    while i < len(res.F):
-        result = res.history[gen].pop.get("X")[i]
-
-        road_points = result[0].intp_points
-        test_cases["tc" + str(i)] = road_points
-        i += 1
-    return test_cases
-
+    return Optimizer().optimize()
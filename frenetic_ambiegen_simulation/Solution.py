@@ -2,9 +2,17 @@
 from frenet_ambiegen.vehicle import Car
 import frenet_ambiegen.config as cf
 from frenet_ambiegen.car_road import Map
-from code_pipeline.beamng_executor import BeamngExecutor
+from frenet_ambiegen.executors import create_executor
 from code_pipeline.tests_generation import RoadTestFactory
 
+
+def states_key(states):
+    '''
+    Hashable key of the states of a test case, equal for test cases with equal states
+    '''
+    return tuple(sorted((name, tuple(sorted(state.items()))) for name, state in states.items()))
+
+
 class Solution:
 
     '''
@@ -22,6 +30,29 @@ class Solution:
         self.intp_points = []
         self.too_sharp = 0
         self.just_fitness = 0
+        self.evaluated_key = None
+        self.simulator_outcome = None  # the outcome of the execution of the road in the simulator
+        self.simulator_key = None  # the states of the executed road
+
+    @property
+    def is_evaluated(self):
+        '''
+        True if the fitness was computed for the current states, the solutions returned
+        unchanged by the operators are not evaluated again
+        '''
+        return self.evaluated_key is not None and self.evaluated_key == states_key(self.states)
+
+    @property
+    def failed_in_simulator(self):
+        '''
+        True if the road of the current states failed in the simulator, the children
+        copied from a failed solution and then changed by the operators are not
+        '''
+        return self.simulator_outcome == "FAIL" and self.simulator_key == states_key(self.states)
+
+    def set_simulator_outcome(self, outcome):
+        self.simulator_outcome = outcome
+        self.simulator_key = states_key(self.states)
 
     def eval_fitness(self):
         road = self.road_points
@@ -36,11 +67,12 @@ class Solution:
             self.intp_points = self.car.interpolate_road(road)
             self.fitness, self.car_path = self.car.execute_road(self.intp_points)
 
+        self.evaluated_key = states_key(self.states)
         return
 
     def car_model_fit(self):
 
-        the_executor = BeamngExecutor(cf.model["map_size"])
+        the_executor = create_executor(map_size=cf.model["map_size"])
 
         the_test = RoadTestFactory.create_road_test(self.road_points)
 
@@ -1,9 +1,40 @@
 from code_pipeline.tests_generation import RoadTestFactory
-from time import sleep
+from time import sleep, time
 import logging as log
+import multiprocessing
+import queue
 import frenet_ambiegen.Optimize as optim
+from frenet_ambiegen.outcome_cache import OutcomeCache
+import frenet_ambiegen.config as cf
 
 
+def produce_test_cases(cases_queue, outcomes_queue, stop):
+    '''
+    Runs the optimization again and again in a background process and puts the new Pareto
+    optimal test cases of every run in the queue. When the queue is full, the process waits
+    for the executor to take test cases, until the stop event is set. The outcomes of the
+    executed test cases are given to the optimizer before every run, so that every run starts
+    from the previous population and the roads that failed in the simulator.
+    '''
+    # the test cases left in the queue are dropped when the process exits
+    cases_queue.cancel_join_thread()
+    optimizer = optim.Optimizer()
+    while not stop.is_set():
+        while True:
+            try:
+                optimizer.report(*outcomes_queue.get_nowait())
+            except queue.Empty:
+                break
+        cases = optimizer.optimize()
+        log.info("Generated %d test cases", len(cases))
+        for case in cases:
+            while not stop.is_set():
+                try:
+                    cases_queue.put((case, cases[case]), timeout=1)
+                    break
+                except queue.Full:
+                    pass
+
 
 class AmbieGenTestGenerator:
     """
@@ -11,22 +42,52 @@ class AmbieGenTestGenerator:
     Initially generated test cases are optimized by NSGA2 algorithm with two objectives:
     fault revealing power and diversity. We use a simplified model of a vehicle to
     estimate the fault revealing power (as the maximum deviation from the road center).
-    We use 100 generations and 100 population size. In each iteration of the generator 
-    the Pareto optimal solutions are provided and executed. Then the algorithm is launched again.
+    We use 100 generations and 100 population size. The algorithm runs in a background process
+    and the Pareto optimal solutions of every run are streamed through a bounded queue, so they are
+    executed while the algorithm is already launched again. The test outcomes are sent back to the
+    optimizer, which starts every run from its previous population and the failed roads, and
+    learns from them which roads are the most likely to fail per second of simulation.
+    The outcomes are also stored, and the roads with nearly the same geometry as an executed
+    road are not executed again.
     """
 
-    def __init__(self, time_budget=None, executor=None, map_size=None):
+    def __init__(self, time_budget=None, executor=None, map_size=None, queue_size=None, outcome_cache_path=None):
         self.map_size = map_size
         self.time_budget = time_budget
         self.executor = executor
+        # by default the generation is at most one run ahead of the execution
+        self.queue_size = queue_size or cf.ga["population"]
+        self.outcome_cache_path = outcome_cache_path or cf.files["outcome_cache"]
 
     def start(self):
 
-        while not self.executor.is_over():
+        cases_queue = multiprocessing.Queue(self.queue_size)
+        outcomes_queue = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        producer = multiprocessing.Process(
+            target=produce_test_cases, args=(cases_queue, outcomes_queue, stop), daemon=True
+        )
+        producer.start()
+
+        outcome_cache = OutcomeCache(self.outcome_cache_path) if self.outcome_cache_path else None
 
-            cases = optim.optimize()
+        try:
+            while not self.executor.is_over():
 
-            for case in cases:
+                try:
+                    case, road_points = cases_queue.get(timeout=1)
+                except queue.Empty:
+                    if not producer.is_alive():
+                        log.error("The test generation process stopped with exit code %s", producer.exitcode)
+                        break
+                    continue
+
+                cached = outcome_cache.get(road_points) if outcome_cache else None
+                if cached is not None:
+                    test_outcome, description = cached
+                    log.info("Skipping %s, the same road was already executed: %s", case, test_outcome)
+                    outcomes_queue.put((case, test_outcome, None))
+                    continue
 
                 # Some debugging
                 log.info(
@@ -34,15 +95,32 @@ class AmbieGenTestGenerator:
                     self.executor.get_remaining_time(),
                 )
 
-                the_test = RoadTestFactory.create_road_test(cases[case])
+                the_test = RoadTestFactory.create_road_test(road_points)
 
                 # Try to execute the test
+                start = time()
                 test_outcome, description, execution_data = self.executor.execute_test(
                     the_test
                 )
+                duration = time() - start
 
                 log.info("test_outcome %s", test_outcome)
                 log.info("description %s", description)
 
+                outcomes_queue.put((case, test_outcome, duration))
+                if outcome_cache:
+                    outcome_cache.put(road_points, test_outcome, description)
+
                 if self.executor.road_visualizer:
                     sleep(1)
+        finally:
+            # the optimization in progress is not needed anymore
+            stop.set()
+            # the outcomes not read by the optimizer are dropped
+            outcomes_queue.cancel_join_thread()
+            producer.join(timeout=5)
+            if producer.is_alive():
+                producer.terminate()
+                producer.join()
+            if outcome_cache:
+                outcome_cache.close()
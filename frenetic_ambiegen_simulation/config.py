@@ -1,4 +1,11 @@
-ga = {"population": 100, "n_gen": 75, "mut_rate": 0.4, "cross_rate": 1}
+ga = {
+    "population": 100,
+    "n_gen": 75,
+    "warm_n_gen": 25,  # generations of the runs started from the previous population
+    "mut_rate": 0.4,
+    "cross_rate": 1,
+    "fail_bonus": 5,  # added to the fault revealing power of the roads that failed in the simulator
+}
 
 model = {
     "speed": 9,  # parameter for the simplified car model
@@ -11,8 +18,16 @@ model = {
     "lane_width":10
 }
 
+executor = {
+    "name": "beamng",  # "beamng" to run the test cases in the simulator, "kinematic" on the simplified car model
+    "latency": 5,  # simulated start time of a test case in seconds, for the kinematic executor
+    "latency_per_meter": 0.05,  # simulated driving time per meter of road, for the kinematic executor
+    "oob_distance": 4,  # deviation from the road center in meters for a failure, for the kinematic executor
+}
+
 files = {
     "ga_archive": ".\\GA_archive\\",
     "tc_img": ".\\TC_img\\",
     "tc_file": ".\\TC_file\\",
+    "outcome_cache": "outcome_cache.db",  # outcomes of the executed roads, None to execute all the roads
 }
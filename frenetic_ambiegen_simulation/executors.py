@@ -0,0 +1,221 @@
+'''
+Module with the executors of the test cases. An executor has the methods execute_test, is_over and
+get_remaining_time and the attribute road_visualizer used by AmbieGenTestGenerator. The BeamNG
+executor of code_pipeline runs the test cases in the simulator, the kinematic executor on the
+simplified car model, so that the pipeline can be run and benchmarked without the simulator.
+'''
+import argparse
+import csv
+import logging as log
+import os
+import time
+
+import numpy as np
+from shapely.geometry import LineString
+
+from frenet_ambiegen.vehicle import Car, is_too_sharp, _interpolate
+import frenet_ambiegen.config as cf
+
+
+class KinematicExecutor:
+    """
+    Stand-in for the BeamNG executor. The test cases are driven by the simplified car model,
+    a test fails if the car deviates more than oob_distance from the road center, and every
+    execution takes latency seconds plus latency_per_meter seconds per meter of road, to
+    reproduce the time spent in the simulator. The time budget is counted from the creation
+    of the executor, and the statistics are written to generation_stats.csv and oob_stats.csv
+    in the result folder after every test case.
+    """
+
+    def __init__(
+        self, result_folder=None, map_size=None, time_budget=None, latency=None,
+        latency_per_meter=None, oob_distance=None, road_visualizer=None,
+    ):
+        self.result_folder = result_folder
+        self.map_size = map_size or cf.model["map_size"]
+        self.time_budget = time_budget
+        self.latency = cf.executor["latency"] if latency is None else latency
+        self.latency_per_meter = cf.executor["latency_per_meter"] if latency_per_meter is None else latency_per_meter
+        self.oob_distance = cf.executor["oob_distance"] if oob_distance is None else oob_distance
+        self.road_visualizer = road_visualizer
+
+        self.start_time = time.time()
+        self.stats = {
+            "test_generated": 0,
+            "test_valid": 0,
+            "test_invalid": 0,
+            "test_passed": 0,
+            "test_failed": 0,
+            "test_in_error": 0,
+            "obes": 0,
+        }
+        self.execution_times = []
+
+        if result_folder:
+            os.makedirs(result_folder, exist_ok=True)
+            with open(os.path.join(result_folder, "oob_stats.csv"), "w", newline="") as f:
+                csv.writer(f).writerow(
+                    ["test_id", "test_outcome", "max_deviation", "is_oob", "road_length", "execution_time"]
+                )
+
+    def get_elapsed_time(self):
+        return time.time() - self.start_time
+
+    def get_remaining_time(self):
+        if self.time_budget is None:
+            return float("inf")
+        return max(0.0, self.time_budget - self.get_elapsed_time())
+
+    def is_over(self):
+        return self.time_budget is not None and self.get_elapsed_time() >= self.time_budget
+
+    def validate_road(self, road_points):
+        '''
+        Same checks as the simplified car model: the road must be inside the map,
+        not intersect itself and not be too sharp
+        '''
+        points = np.asarray(road_points, dtype=float)
+        if len(points) < 3:
+            return False, "Not enough road points"
+        if points.min() < 0 or points.max() > self.map_size:
+            return False, "Not entirely inside the map boundaries"
+        if not LineString(points).is_simple:
+            return False, "The road is self-intersecting"
+        if is_too_sharp(_interpolate(road_points)):
+            return False, "The road is too sharp"
+        return True, ""
+
+    def drive(self, road_points):
+        '''
+        Returns the maximal deviation of the simplified car model from the road center and the path of the car
+        '''
+        # the car model changes its speed while driving, so every road gets a new car
+        car = Car(cf.model["speed"], cf.model["steer_ang"], self.map_size)
+        fitness, car_path = car.execute_road(car.interpolate_road(road_points))
+        return -fitness, car_path
+
+    def _eval_tc(self, the_test):
+        return self.drive([(p[0], p[1]) for p in the_test.road_points])[0]
+
+    def execute_test(self, the_test):
+        """
+        It executes a test case on the simplified car model
+
+        Args:
+          the_test: the road test created by RoadTestFactory
+
+        Returns:
+          A tuple with the test outcome, its description and the path of the car.
+        """
+        self.stats["test_generated"] += 1
+        test_id = self.stats["test_generated"]
+        road_points = [(p[0], p[1]) for p in the_test.road_points]
+
+        is_valid, description = self.validate_road(road_points)
+        if not is_valid:
+            self.stats["test_invalid"] += 1
+            self.write_stats()
+            return "INVALID", description, []
+        self.stats["test_valid"] += 1
+
+        start = time.time()
+        try:
+            deviation, car_path = self.drive(road_points)
+        except Exception as e:  # the simulator can also fail, the test is reported as an error
+            log.exception("Execution of test %d failed", test_id)
+            self.stats["test_in_error"] += 1
+            self.write_stats()
+            return "ERROR", str(e), []
+
+        road_length = LineString(road_points).length
+        # the rest of the simulated time is spent waiting, like for the simulator
+        remaining = self.latency + self.latency_per_meter * road_length - (time.time() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        execution_time = time.time() - start
+        self.execution_times.append(execution_time)
+
+        is_oob = deviation > self.oob_distance
+        if is_oob:
+            self.stats["test_failed"] += 1
+            self.stats["obes"] += 1
+            test_outcome = "FAIL"
+            description = "Car drove out of the lane, deviation %.2f" % deviation
+        else:
+            self.stats["test_passed"] += 1
+            test_outcome = "PASS"
+            description = "Successful test"
+
+        if self.result_folder:
+            with open(os.path.join(self.result_folder, "oob_stats.csv"), "a", newline="") as f:
+                csv.writer(f).writerow(
+                    [test_id, test_outcome, round(deviation, 3), is_oob, round(road_length, 3), round(execution_time, 3)]
+                )
+        self.write_stats()
+        return test_outcome, description, car_path
+
+    def get_stats(self):
+        '''
+        Returns the counters of the test cases, the elapsed time and the number of tests per minute
+        '''
+        stats = dict(self.stats)
+        elapsed_time = self.get_elapsed_time()
+        stats["time_budget"] = self.time_budget
+        stats["elapsed_time"] = round(elapsed_time, 3)
+        stats["mean_execution_time"] = round(float(np.mean(self.execution_times)), 3) if self.execution_times else 0
+        stats["tests_per_minute"] = round(stats["test_generated"] * 60 / elapsed_time, 3) if elapsed_time else 0
+        return stats
+
+    def write_stats(self):
+        if not self.result_folder:
+            return
+        stats = self.get_stats()
+        with open(os.path.join(self.result_folder, "generation_stats.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(stats))
+            writer.writerow(list(stats.values()))
+
+
+def create_executor(name=None, map_size=None, **kwargs):
+    """
+    It creates the executor of the test cases
+
+    Args:
+      name: "beamng" to run the test cases in the simulator, "kinematic" to run them on the
+    simplified car model, None for cf.executor["name"]
+      map_size: the size of the map, None for cf.model["map_size"]
+      kwargs: the other arguments of the executor
+
+    Returns:
+      The executor.
+    """
+    name = name or cf.executor["name"]
+    map_size = map_size or cf.model["map_size"]
+    if name == "beamng":
+        # imported only here, so that the package does not need the simulator
+        from code_pipeline.beamng_executor import BeamngExecutor
+        return BeamngExecutor(map_size, **kwargs)
+    if name == "kinematic":
+        return KinematicExecutor(map_size=map_size, **kwargs)
+    raise ValueError("Unknown executor %s" % name)
+
+
+if __name__ == "__main__":
+    from frenet_ambiegen.ambiegen_generator import AmbieGenTestGenerator
+
+    parser = argparse.ArgumentParser(description="Run the test generation on the kinematic executor")
+    parser.add_argument("--time-budget", type=float, default=600, help="time budget in seconds")
+    parser.add_argument("--latency", type=float, default=None, help="simulated start time of a test in seconds")
+    parser.add_argument(
+        "--latency-per-meter", type=float, default=None, help="simulated driving time per meter of road"
+    )
+    parser.add_argument("--result-folder", default="results", help="folder of the statistics files")
+    args = parser.parse_args()
+
+    log.basicConfig(level=log.INFO)
+    executor = KinematicExecutor(
+        result_folder=args.result_folder, time_budget=args.time_budget,
+        latency=args.latency, latency_per_meter=args.latency_per_meter,
+    )
+    AmbieGenTestGenerator(time_budget=args.time_budget, executor=executor).start()
+    log.info("Generation statistics: %s", executor.get_stats())
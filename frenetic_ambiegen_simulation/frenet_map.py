@@ -2,6 +2,22 @@ import numpy as np
 import config as cf
 
 
+def frenet_to_cartesian_batch(x0, y0, theta0, ds, kappas, lengths):
+    """
+    Converts several curvature sequences, one per row and padded to the same length, to Cartesian
+    points. Headings and positions are cumulative sums, so there is no loop over the road points.
+    :return: Positions (m, n + 1, 2) starting with (x0, y0) and headings (m, n + 1)
+    """
+    kappas = np.asarray(kappas, dtype=float).reshape(len(kappas), -1)
+    m, n = kappas.shape
+    mask = np.arange(n)[None, :] < np.asarray(lengths)[:, None]
+    steps = np.where(mask, kappas * ds, 0.0)
+    headings = np.add.accumulate(np.column_stack((np.full(m, theta0, dtype=float), steps)), axis=1)
+    xs = np.add.accumulate(np.column_stack((np.full(m, x0, dtype=float), ds * np.cos(headings[:, :-1]))), axis=1)
+    ys = np.add.accumulate(np.column_stack((np.full(m, y0, dtype=float), ds * np.sin(headings[:, :-1]))), axis=1)
+    return np.stack((xs, ys), axis=2), headings
+
+
 class FrenetMap:
     """
     A new Map class to handle road generation in Frenet coordinates.
@@ -20,32 +36,39 @@ class FrenetMap:
         :param lane_width: Lane width for the road
         :return: List of road points in Cartesian coordinates
         """
-        x, y, theta = self.map_size / 2, self.map_size / 2, 0.0  # Initial position
-        road_points = []
-
-        for kappa in kappas:
-            # 计算每个曲率点
-            delta_x = ds * np.cos(theta)
-            delta_y = ds * np.sin(theta)
-            x += delta_x
-            y += delta_y
-            theta += kappa * ds  # 更新方向
-
-            # 保存当前点
-            road_points.append((x, y, theta))
+        road_points = self.generate_roads([kappas], ds, lane_width)[0]
 
         self.road_points = road_points
         return road_points
 
+    def generate_roads(self, kappas, ds, lane_width, lengths=None):
+        """
+        Generates several roads at once using Frenet coordinates.
+        :param kappas: 2-D array of curvature values, one road per row, padded to the same length
+        :param ds: Step size along the road
+        :param lane_width: Lane width for the road
+        :param lengths: Number of curvature values of every road, None if all rows are used completely
+        :return: List with the road points of every road in Cartesian coordinates
+        """
+        kappas = np.asarray(kappas, dtype=float).reshape(len(kappas), -1)
+        if lengths is None:
+            lengths = np.full(len(kappas), kappas.shape[1])
+        points, headings = frenet_to_cartesian_batch(self.map_size / 2, self.map_size / 2, 0.0, ds, kappas, lengths)
+
+        # every point is stored with the heading after its curvature was applied
+        roads = []
+        for i, n in enumerate(lengths):
+            roads.append([(x, y, theta) for (x, y), theta in zip(points[i, 1:n + 1], headings[i, 1:n + 1])])
+        return roads
+
     def get_points_from_frenet_scenario(self, scenario):
         """
         Converts a given Frenet scenario into a list of Cartesian points.
         :param scenario: A list of (action, length, curvature)
         :return: A list of road points in Cartesian coordinates
         """
-        x, y, theta = self.map_size / 2, self.map_size / 2, 0.0  # Initial position
-        road_points = []
-
+        ds = 1.0  # Step size
+        kappas = []
         for action, length, curvature in scenario:
             if action == 0:  # Go straight
                 kappa = 0
@@ -55,17 +78,10 @@ class FrenetMap:
                 kappa = curvature
 
             # Generate points for this segment
-            ds = 1.0  # Step size
             num_steps = int(length / ds)
-            for _ in range(num_steps):
-                delta_x = ds * np.cos(theta)
-                delta_y = ds * np.sin(theta)
-                x += delta_x
-                y += delta_y
-                theta += kappa * ds  # Update direction
-                road_points.append((x, y, theta))
-        # print(road_points)
-        return road_points
+            kappas += [kappa] * num_steps
+
+        return self.generate_roads([kappas], ds, 0)[0]
 
     def is_valid_road(self, road_points):
         """
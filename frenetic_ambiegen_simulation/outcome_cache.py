@@ -0,0 +1,162 @@
+'''
+Module for storing the outcomes of the roads executed in the simulator.
+'''
+import os
+import json
+import sqlite3
+import hashlib
+import logging as log
+from collections import defaultdict
+
+import numpy as np
+
+# Increase when the execution of the roads changes, so that old outcomes are not reused
+OUTCOME_VERSION = 1
+
+# The outcomes that depend only on the road, the other ones (ERROR) are not stored
+CACHED_OUTCOMES = ("PASS", "FAIL", "INVALID")
+
+
+def road_descriptor(road_points, n_points=20):
+    """
+    It resamples a road at n_points positions equally spaced along its length, so that roads with
+    the same geometry have close descriptors whatever the number of their points.
+
+    Args:
+      road_points: the (x, y) points of the road
+      n_points: the number of points of the descriptor
+
+    Returns:
+      An array of shape (n_points, 2).
+    """
+    points = np.asarray(road_points, dtype=float)[:, :2]
+    distances = np.concatenate(([0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))))
+    positions = np.linspace(0, distances[-1], n_points)
+    return np.column_stack(
+        (np.interp(positions, distances, points[:, 0]), np.interp(positions, distances, points[:, 1]))
+    )
+
+
+def road_key(descriptor, resolution):
+    """
+    It computes the hash of a road descriptor quantized to the resolution
+
+    Returns:
+      The hexadecimal hash of the road.
+    """
+    cells = np.round(descriptor / resolution).astype(int).tolist()
+    payload = json.dumps([OUTCOME_VERSION, resolution, cells], separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class OutcomeCache:
+    """
+    Store of the outcomes of the executed roads, kept in a SQLite database so that
+    it is shared between the runs. A road is found if it has the same quantized
+    geometry as a stored road, or if all the points of its descriptor are within
+    the tolerance of the ones of a stored road. For the second lookup, the stored
+    roads are indexed on a grid by their first point.
+    """
+
+    def __init__(self, path, resolution=1.0, tolerance=1.0, n_points=20):
+        self.path = path
+        self.resolution = resolution
+        self.tolerance = tolerance
+        self.n_points = n_points
+        self.outcomes = {}
+        self.descriptors = {}
+        self.grid = defaultdict(list)
+        self.hits = 0
+        self.misses = 0
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes ("
+            "key TEXT PRIMARY KEY, outcome TEXT, description TEXT, descriptor TEXT)"
+        )
+        self.connection.commit()
+
+        for key, outcome, description, descriptor in self.connection.execute(
+            "SELECT key, outcome, description, descriptor FROM outcomes"
+        ):
+            descriptor = np.array(json.loads(descriptor), dtype=float)
+            if descriptor.shape == (self.n_points, 2):
+                self._index(key, outcome, description, descriptor)
+        log.info("Outcome cache %s: %d roads loaded", path, len(self.outcomes))
+
+    def _cell(self, point):
+        return tuple(np.floor(point / self.tolerance).astype(int).tolist())
+
+    def _index(self, key, outcome, description, descriptor):
+        if key not in self.outcomes:
+            self.grid[self._cell(descriptor[0])].append(key)
+        self.outcomes[key] = (outcome, description)
+        self.descriptors[key] = descriptor
+
+    def _nearest(self, descriptor):
+        """
+        It finds a stored road whose descriptor is within the tolerance of the given one.
+        Such a road has its first point in one of the 3x3 grid cells around the first point
+        of the given road.
+        """
+        x, y = self._cell(descriptor[0])
+        keys = [key for i in (-1, 0, 1) for j in (-1, 0, 1) for key in self.grid.get((x + i, y + j), ())]
+        if not keys:
+            return None
+        stored = np.stack([self.descriptors[key] for key in keys])
+        distances = np.linalg.norm(stored - descriptor, axis=2).max(axis=1)
+        best = int(np.argmin(distances))
+        return keys[best] if distances[best] <= self.tolerance else None
+
+    def get(self, road_points):
+        """
+        It looks up the outcome of a road, or of a road with nearly the same geometry
+
+        Args:
+          road_points: the road points of the test case
+
+        Returns:
+          A tuple with the test outcome and description, or None if no such road was executed yet.
+        """
+        descriptor = road_descriptor(road_points, self.n_points)
+        key = road_key(descriptor, self.resolution)
+        if key not in self.outcomes:
+            key = self._nearest(descriptor)
+        if key is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.outcomes[key]
+
+    def put(self, road_points, outcome, description):
+        """
+        It stores the outcome of an executed road, the outcomes that do not depend only
+        on the road are ignored
+
+        Args:
+          road_points: the road points of the test case
+          outcome: the test outcome given by the executor
+          description: the description of the outcome
+        """
+        if outcome not in CACHED_OUTCOMES:
+            return
+        descriptor = road_descriptor(road_points, self.n_points)
+        key = road_key(descriptor, self.resolution)
+        description = str(description)
+        self._index(key, outcome, description, descriptor)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?)",
+                (key, outcome, description, json.dumps(descriptor.tolist())),
+            )
+
+    def close(self):
+        """
+        It closes the connection to the database
+        """
+        log.info("Outcome cache %s: %d hits, %d misses", self.path, self.hits, self.misses)
+        self.connection.close()
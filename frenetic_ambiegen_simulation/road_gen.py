@@ -3,7 +3,7 @@ import math
 import numpy as np
 
 from frenet_ambiegen.road_validity_check import interpolation_distance, rounding_precision, smoothness, is_inside_map, \
-    interpolate_test
+    interpolate_test, curvature, circumradius
 from code_pipeline.tests_generation import min_num_nodes
 from frenet_ambiegen.frenet_map import FrenetMap
 from scipy.interpolate import splprep, splev
@@ -133,13 +133,7 @@ class RoadGen:
         :param y: y坐标列表
         :return: 曲率列表
         """
-        dx = np.gradient(x)
-        dy = np.gradient(y)
-        ddx = np.gradient(dx)
-        ddy = np.gradient(dy)
-        curvature = (dx * ddy - dy * ddx) / (dx ** 2 + dy ** 2) ** 1.5
-        # print(curvature)
-        return curvature
+        return curvature(np.column_stack((x, y)))
 
     def is_too_sharp(self,the_test, max_curvature=0.2):
         """
@@ -148,10 +142,7 @@ class RoadGen:
         :param max_curvature: 最大允许曲率
         :return: True 如果存在急弯，否则 False
         """
-        x = [p[0] for p in the_test]
-        y = [p[1] for p in the_test]
-        curvature = self.calculate_curvature(x, y)
-        return np.max(np.abs(curvature)) < max_curvature
+        return np.max(np.abs(curvature(the_test))) < max_curvature
 
     def is_valid_road(self,points):
         """
@@ -178,34 +169,6 @@ class RoadGen:
         )
         return not (invalid)
 
-    def find_circle(self,p1, p2, p3):
-        """
-        The function takes three points and returns the radius of the circle that passes through them
-
-        Args:
-          p1: the first point
-          p2: the point that is the center of the circle
-          p3: the point that is the furthest away from the line
-
-        Returns:
-          The radius of the circle.
-        """
-        temp = p2[0] * p2[0] + p2[1] * p2[1]
-        bc = (p1[0] * p1[0] + p1[1] * p1[1] - temp) / 2
-        cd = (temp - p3[0] * p3[0] - p3[1] * p3[1]) / 2
-        det = (p1[0] - p2[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (p1[1] - p2[1])
-
-        if abs(det) < 1.0e-6:
-            return np.inf
-
-        # Center of circle
-        cx = (bc * (p2[1] - p3[1]) - cd * (p1[1] - p2[1])) / det
-        cy = ((p1[0] - p2[0]) * cd - (p2[0] - p3[0]) * bc) / det
-
-        radius = np.sqrt((cx - p1[0]) ** 2 + (cy - p1[1]) ** 2)
-        # print(radius)
-        return radius
-
     def min_radius(self,x, w=5):
         """
         It takes a list of points (x) and a window size (w) and returns the minimum radius of curvature of
@@ -218,15 +181,7 @@ class RoadGen:
         Returns:
           The minimum radius of curvature of the road.
         """
-        mr = np.inf
-        nodes = x
-        for i in range(len(nodes) - w):
-            p1 = nodes[i]
-            p2 = nodes[i + int((w - 1) / 2)]
-            p3 = nodes[i + (w - 1)]
-            radius = self.find_circle(p1, p2, p3)
-            if radius < mr:
-                mr = radius
+        mr = circumradius(x, w).min(initial=np.inf)
         if mr == np.inf:
             mr = 0
 
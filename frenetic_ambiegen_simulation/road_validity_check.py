@@ -96,33 +96,51 @@ def is_valid_road(points):
     )
     return not(invalid)
 
-# some of this code was taken from https://github.com/se2p/tool-competition-av
-def find_circle(p1, p2, p3):
+def curvature(points):
     """
-    The function takes three points and returns the radius of the circle that passes through them
+    Derivative based curvature of the road points, computed on the (N, 2) array of the points.
 
     Args:
-      p1: the first point
-      p2: the point that is the center of the circle
-      p3: the point that is the furthest away from the line
+      points: the x,y coordinates of the points
 
     Returns:
-      The radius of the circle.
+      An array with the signed curvature at every point.
     """
-    temp = p2[0] * p2[0] + p2[1] * p2[1]
-    bc = (p1[0] * p1[0] + p1[1] * p1[1] - temp) / 2
-    cd = (temp - p3[0] * p3[0] - p3[1] * p3[1]) / 2
-    det = (p1[0] - p2[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (p1[1] - p2[1])
+    points = np.asarray(points, dtype=float)
+    dx, dy = np.gradient(points[:, :2], axis=0).T
+    ddx = np.gradient(dx)
+    ddy = np.gradient(dy)
+    return (dx * ddy - dy * ddx) / (dx**2 + dy**2)**1.5
+
 
-    if abs(det) < 1.0e-6:
-        return np.inf
+# some of this code was taken from https://github.com/se2p/tool-competition-av
+def circumradius(points, w=5):
+    """
+    Radius of the circle through the first, middle and last point of every window of w points,
+    computed for all the windows at once.
 
-    # Center of circle
-    cx = (bc * (p2[1] - p3[1]) - cd * (p1[1] - p2[1])) / det
-    cy = ((p1[0] - p2[0]) * cd - (p2[0] - p3[0]) * bc) / det
+    Args:
+      points: the x,y coordinates of the points
+      w: window size. Defaults to 5
 
-    radius = np.sqrt((cx - p1[0]) ** 2 + (cy - p1[1]) ** 2)
-    # print(radius)
+    Returns:
+      An array with the radius of every window, inf if the points of the window are collinear.
+    """
+    points = np.array([[p[0], p[1]] for p in points], dtype=float).reshape(-1, 2)
+    n_windows = max(len(points) - w, 0)
+    x1, y1 = points[:n_windows, 0], points[:n_windows, 1]
+    x2, y2 = points[int((w - 1) / 2):int((w - 1) / 2) + n_windows].T
+    x3, y3 = points[w - 1:w - 1 + n_windows].T
+
+    temp = x2 * x2 + y2 * y2
+    bc = (x1 * x1 + y1 * y1 - temp) / 2
+    cd = (temp - x3 * x3 - y3 * y3) / 2
+    det = (x1 - x2) * (y2 - y3) - (x2 - x3) * (y1 - y2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cx = (bc * (y2 - y3) - cd * (y1 - y2)) / det
+        cy = ((x1 - x2) * cd - (x2 - x3) * bc) / det
+    radius = np.sqrt((cx - x1) ** 2 + (cy - y1) ** 2)
+    radius[(np.abs(det) < 1.0e-6) | np.isnan(radius)] = np.inf
     return radius
 
 
@@ -138,15 +156,8 @@ def min_radius(x, w=5):
     Returns:
       The minimum radius of curvature of the road.
     """
-    mr = np.inf
-    nodes = x
-    for i in range(len(nodes) - w):
-        p1 = nodes[i]
-        p2 = nodes[i + int((w - 1) / 2)]
-        p3 = nodes[i + (w - 1)]
-        radius = find_circle(p1, p2, p3)
-        if radius < mr:
-            mr = radius
+    radius = circumradius(x, w)
+    mr = radius.min(initial=np.inf)
     if mr == np.inf:
         mr = 0
 
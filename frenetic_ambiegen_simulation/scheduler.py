@@ -0,0 +1,126 @@
+'''
+Module for ordering the test cases by their expected number of failures per second of simulation.
+'''
+import logging as log
+
+import numpy as np
+
+# prior weights of the failure model, for the bias, the deviation of the simplified car model
+# in meters and the road length in hundreds of meters. A deviation of 4 meters gives a
+# failure probability of 0.5, as the constraint of the optimization
+PRIOR_FAILURE = (-4.0, 1.0, 0.0)
+# prior weights of the time model, for the start of the simulation in seconds and
+# the seconds per meter of road
+PRIOR_TIME = (10.0, 0.1)
+# strength of the priors, in number of observations
+REGULARIZATION = 1.0
+
+
+def road_length(road_points):
+    points = np.asarray(road_points, dtype=float).reshape(-1, 2)
+    return float(np.linalg.norm(np.diff(points, axis=0), axis=1).sum())
+
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+class Scheduler:
+    """
+    Online model of the outcome and of the execution time of the test cases.
+    The failure probability is a logistic regression of the deviation of the simplified car
+    model and of the road length, the execution time a linear regression of the road length.
+    Both are fitted again on all the observed executions after every observation, with
+    priors that keep them stable before enough tests are executed.
+    """
+
+    def __init__(self):
+        self.features = []
+        self.failures = []
+        self.lengths = []
+        self.durations = []
+        self.failure_weights = np.array(PRIOR_FAILURE)
+        self.time_weights = np.array(PRIOR_TIME)
+
+    @staticmethod
+    def failure_features(fitness, length):
+        # the fitness is the maximal deviation with a negative sign
+        return np.array([1.0, -fitness, length / 100])
+
+    def observe(self, fitness, road_points, outcome, duration=None):
+        """
+        It updates the models with the outcome of an executed test case
+
+        Args:
+          fitness: the fitness of the test case given by the simplified car model
+          road_points: the road points of the test case
+          outcome: the test outcome given by the executor
+          duration: the execution time in seconds, None if the test case was not executed
+        """
+        if outcome not in ("PASS", "FAIL"):
+            return
+        length = road_length(road_points)
+        self.features.append(self.failure_features(fitness, length))
+        self.failures.append(1.0 if outcome == "FAIL" else 0.0)
+        self._fit_failure()
+        if duration is not None:
+            self.lengths.append(length)
+            self.durations.append(duration)
+            self._fit_time()
+
+    def _fit_failure(self, iterations=10):
+        '''
+        Newton iterations of the logistic regression with a Gaussian prior around PRIOR_FAILURE
+        '''
+        X = np.array(self.features)
+        y = np.array(self.failures)
+        prior = np.array(PRIOR_FAILURE)
+        w = self.failure_weights
+        for _ in range(iterations):
+            p = sigmoid(X @ w)
+            gradient = X.T @ (p - y) + REGULARIZATION * (w - prior)
+            hessian = (X.T * (p * (1 - p))) @ X + REGULARIZATION * np.eye(len(w))
+            step = np.linalg.solve(hessian, gradient)
+            w = w - step
+            if np.abs(step).max() < 1e-6:
+                break
+        self.failure_weights = w
+
+    def _fit_time(self):
+        '''
+        Least squares of the execution time with a Gaussian prior around PRIOR_TIME
+        '''
+        X = np.column_stack((np.ones(len(self.lengths)), self.lengths))
+        y = np.array(self.durations)
+        prior = np.array(PRIOR_TIME)
+        A = X.T @ X + REGULARIZATION * np.eye(2)
+        self.time_weights = np.linalg.solve(A, X.T @ y + REGULARIZATION * prior)
+
+    def failure_probability(self, fitness, road_points):
+        return float(sigmoid(self.failure_features(fitness, road_length(road_points)) @ self.failure_weights))
+
+    def expected_time(self, road_points):
+        return max(1.0, float(self.time_weights @ (1.0, road_length(road_points))))
+
+    def priority(self, fitness, road_points):
+        """
+        Returns:
+          The expected number of failures per second of execution of the test case.
+        """
+        return self.failure_probability(fitness, road_points) / self.expected_time(road_points)
+
+    def order(self, solutions):
+        """
+        It sorts the solutions by decreasing priority, the solutions must have a fitness and intp_points
+
+        Returns:
+          The sorted list of solutions.
+        """
+        priorities = [self.priority(s.fitness, s.intp_points) for s in solutions]
+        order = sorted(range(len(solutions)), key=lambda i: -priorities[i])
+        if solutions:
+            log.info(
+                "Scheduled %d test cases, failure weights %s, time weights %s",
+                len(solutions), np.round(self.failure_weights, 3), np.round(self.time_weights, 3),
+            )
+        return [solutions[i] for i in order]
@@ -6,6 +6,8 @@ from scipy.interpolate import splprep, splev
 from shapely.geometry import LineString, Point
 from numpy.ma import arange
 
+from frenet_ambiegen.road_validity_check import circumradius
+
 
 class Car:
     """Class that conducts transformations to vectors automatically,
@@ -112,18 +114,20 @@ class Car:
         self.final_dist = []
         self.distance = 0
 
-        road = LineString([(t[0], t[1]) for t in nodes])
         mini_nodes1 = nodes[: round(len(nodes) / 2)]
         mini_nodes2 = nodes[round(len(nodes) / 2) :]
         if (len(mini_nodes1) < 2) or (len(mini_nodes2) < 2):
             return 0, []
-        mini_road1 = LineString([(t[0], t[1]) for t in mini_nodes1])
-        mini_road2 = LineString([(t[0], t[1]) for t in mini_nodes2])
-        road_split = [mini_road1, mini_road2]
 
+        # rejected roads are not executed
+        road = LineString([(t[0], t[1]) for t in nodes])
         if (road.is_simple is False) or (is_too_sharp(_interpolate(nodes)) is True):
             fitness = 0
         else:
+            mini_road1 = LineString([(t[0], t[1]) for t in mini_nodes1])
+            mini_road2 = LineString([(t[0], t[1]) for t in mini_nodes2])
+            road_split = [mini_road1, mini_road2]
+
             init_pos = nodes[0]
             self.x = init_pos[0]
             self.y = init_pos[1]
@@ -138,22 +142,23 @@ class Car:
             for p, mini_road in enumerate(road_split):
 
                 current_length = 0
+                road_length = mini_road.length
                 if p == 1:
 
                     self.x = mini_nodes2[0][0]
                     self.y = mini_nodes2[0][1]
                     self.angle = self.get_angle(mini_nodes1[-1], mini_nodes2[0])
 
-                current_pos = [(self.x, self.y)]
+                # length of the path driven on the current part of the road, updated at every step
+                last_x, last_y = self.x, self.y
 
-                while (current_length < mini_road.length) and i < 1000:
+                while (current_length < road_length) and i < 1000:
                     distance = self.get_distance(mini_road, self.x, self.y)
                     self.distance = distance
 
                     self.tot_dist.append(distance)
                     if distance <= 1:
                         self.go_straight()
-                        current_pos.append((self.x, self.y))
                         self.speed += 0.3
 
                     else:
@@ -171,15 +176,13 @@ class Car:
 
                         if distance_right < distance_left:
                             self.turn_right()
-                            current_pos.append((self.x, self.y))
                         else:
                             self.turn_left()
-                            current_pos.append((self.x, self.y))
 
                         self.speed -= 0.1
 
-                    current_road = LineString(current_pos)
-                    current_length = current_road.length
+                    current_length += m.sqrt((self.x - last_x) ** 2 + (self.y - last_y) ** 2)
+                    last_x, last_y = self.x, self.y
 
                     i += 1
 
@@ -192,38 +195,9 @@ class Car:
         return fitness, [self.tot_x, self.tot_y]
 
 
-def find_circle(p1, p2, p3):
-    """
-    Returns the center and radius of the circle passing the given 3 points.
-    In case the 3 points form a line, returns (None, infinity).
-    """
-    temp = p2[0] * p2[0] + p2[1] * p2[1]
-    bc = (p1[0] * p1[0] + p1[1] * p1[1] - temp) / 2
-    cd = (temp - p3[0] * p3[0] - p3[1] * p3[1]) / 2
-    det = (p1[0] - p2[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (p1[1] - p2[1])
-
-    if abs(det) < 1.0e-6:
-        return np.inf
-
-    # Center of circle
-    cx = (bc * (p2[1] - p3[1]) - cd * (p1[1] - p2[1])) / det
-    cy = ((p1[0] - p2[0]) * cd - (p2[0] - p3[0]) * bc) / det
-
-    radius = np.sqrt((cx - p1[0]) ** 2 + (cy - p1[1]) ** 2)
-    # print(radius)
-    return radius
-
-
 def min_radius(x, w=5):
-    mr = np.inf
-    nodes = x
-    for i in range(len(nodes) - w):
-        p1 = nodes[i]
-        p2 = nodes[i + int((w - 1) / 2)]
-        p3 = nodes[i + (w - 1)]
-        radius = find_circle(p1, p2, p3)
-        if radius < mr:
-            mr = radius
+    radius = circumradius(x, w)
+    mr = radius.min(initial=np.inf)
     if mr == np.inf:
         mr = 0
 
@@ -1,21 +1,26 @@
 import argparse
 import sys
+import time
 import logging as log
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from pymoo.optimize import minimize
-from pymoo.termination import get_termination
 
 
 import config as cf
 from ambiegen import ALRGORITHMS
 from ambiegen.duplicate_elimination.duplicate_rem import DuplicateElimination
-from ambiegen.problems import PROBLEMS
+from ambiegen.problems import PROBLEMS, BATCH_PROBLEMS
 from ambiegen.samplers import SAMPLERS
 from ambiegen.search_operators import OPERATORS
+from ambiegen.utils.budget_termination import get_budget_termination
 from ambiegen.utils.get_convergence import get_convergence
 from ambiegen.utils.get_stats import get_stats
 from ambiegen.utils.get_test_suite import get_test_suite
-from ambiegen.utils.random_seed import get_random_seed
+from ambiegen.utils.history_recorder import HistoryRecorder
+from ambiegen.utils.parallel_evaluate import ProcessPoolEvaluation
+from ambiegen.utils.fitness_cache import set_fitness_cache
+from ambiegen.utils.random_seed import get_run_seeds
 from ambiegen.utils.save_tc_results import save_tc_results
 from ambiegen.utils.save_tcs_images import save_tcs_images
 
@@ -55,32 +60,33 @@ def parse_arguments():
                     description = 'A tool for generating test cases for autonomous systems',
                     epilog = "For more information, please visit https://github.com/swat-lab-optimization/AmbieGen-tool ")
     parser.add_argument('--problem', type=str, default="vehicle", help='Problem to solve, possivle values: vehicle, robot')
-    parser.add_argument('--algorithm', type=str, default="nsga2", help='Algorithm to use, possivle values: nsga2, ga, random')
+    parser.add_argument('--algorithm', type=str, nargs='+', default=["nsga2"], help='Algorithms to use, possivle values: nsga2, ga, random')
     parser.add_argument('--runs', type=int, default=2, help='Number of runs')
+    parser.add_argument('--parallel', type=int, default=1, help='Number of runs executed at the same time in separate processes')
     parser.add_argument('--save_results', type=str, default=True, help='Save results, possible values: True, False')
     parser.add_argument('--seed', type=int, default=None, help='Random seed')
     parser.add_argument('--debug', type=str, default=False, help='Run in debug mode, possible values: True, False')
+    parser.add_argument('--batch', action='store_true', help='Evaluate the whole population at once with the vectorized vehicle model')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes used to evaluate the individuals')
+    parser.add_argument('--cache', type=str, default=None, help='Path of the SQLite file used to cache the evaluated test cases')
+    parser.add_argument('--time-budget', type=float, default=None, help='Time budget of every run in seconds, the run stops at the deadline instead of after n_gen generations')
+    parser.add_argument('--eval-budget', type=int, default=None, help='Maximum number of evaluations of every run')
+    parser.add_argument('--max-steps', type=int, default=None, help='Maximum number of steps of the simulation of a road, overrides the configuration')
+    parser.add_argument('--stop-deviation', type=float, default=None, help='Stop the simulation of a road once the deviation from the road exceeds this value')
     
     arguments = parser.parse_args()
     return arguments
 
 
-def main(problem, algo, runs_number, save_results, random_seed, debug):
+def run_optimization(problem, algo, run, seed, save_results, batch=False, runner=None, time_budget=None, eval_budget=None, verbose=True):
     """
-    Function for running the optimization and saving the results"""
+    Function for executing one run of the optimization
 
-    log_file = "logs.txt"
-
-
-
-    setup_logging(log_file, debug)
-
-    log.info("Running the optimization")
-    log.info("Problem: %s, Algorithm: %s, Runs number: %s, Saving the results: %s", problem, algo, runs_number, save_results)
-
-    if cf.ga["pop_size"] < cf.ga["test_suite_size"]:
-        log.error("Population size should be greater or equal to test suite size")
-        sys.exit(1)
+    Returns:
+      The statistics, the test suite and the convergence of the run.
+    """
+    log.info("Executing run %d of %s: ", run, algo)
+    log.info("Using random seed: %s", seed)
 
     n_offsprings = cf.ga["pop_size"]
     algorithm = ALRGORITHMS[algo](
@@ -93,48 +99,141 @@ def main(problem, algo, runs_number, save_results, random_seed, debug):
         n_points_per_iteration=n_offsprings
     )
 
-    termination = get_termination("n_gen", cf.ga["n_gen"])
-    #termination = get_termination("n_eval", 3000)
+    termination = get_budget_termination(cf.ga["n_gen"], time_budget, eval_budget)
+
+    if batch:
+        opt_problem = BATCH_PROBLEMS[problem + "_" + algo]()
+    elif runner is not None:
+        opt_problem = PROBLEMS[problem + "_" + algo](elementwise_runner=runner)
+    else:
+        opt_problem = PROBLEMS[problem + "_" + algo]()
+
+    history = HistoryRecorder()
+    res = minimize(
+        opt_problem,
+        algorithm,
+        termination,
+        seed=seed,
+        verbose=verbose,
+        callback=history,
+        eliminate_duplicates=True
+    )
+
+    log.info("Execution time, %f sec", res.exec_time)
+    n_evals = res.algorithm.evaluator.n_eval
+    log.info("Evaluations: %d, %f evaluations/sec", n_evals, n_evals / max(res.exec_time, 1e-9))
+
+    test_suite = get_test_suite(res, algo)
+    stats = get_stats(res, problem, algo)
+    convergence = get_convergence(history, n_offsprings)
+
+    if save_results:
+        save_tcs_images(test_suite, problem, run, algo)
+
+    return stats, test_suite, convergence
 
-    tc_stats = {}
-    tcs = {}
-    tcs_convergence = {}
-    for m in range(runs_number):
-        log.info("Executing run %d: ", m)
-        if (random_seed is not None) and (m == 0):
-            seed = random_seed
-        else:
-            seed = get_random_seed()
 
-        
-        log.info("Using random seed: %s", seed)
+def run_in_process(ga_config, vehicle_env, workers, cache, **run_args):
+    """
+    Function executed in the processes of the run scheduler. The configuration of the main process
+    is copied to the process, and every process uses its own evaluation workers and cache connection.
+    """
+    cf.ga.update(ga_config)
+    cf.vehicle_env.update(vehicle_env)
+    fitness_cache = set_fitness_cache(cache)
+    runner = None
+    if workers > 1 and not run_args["batch"]:
+        runner = ProcessPoolEvaluation(workers, cache)
+    try:
+        return run_optimization(runner=runner, verbose=False, **run_args)
+    finally:
+        if runner is not None:
+            runner.close()
+        if fitness_cache is not None:
+            fitness_cache.close()
+
+
+def main(problem, algo, runs_number, save_results, random_seed, debug, batch=False, workers=1, cache=None, time_budget=None, eval_budget=None, parallel=1):
+    """
+    Function for running the optimization and saving the results.
+    The runs of all the algorithms are scheduled on parallel processes, each run with its own random seed,
+    and the results of the runs are merged per algorithm"""
+
+    log_file = "logs.txt"
+
+
+
+    setup_logging(log_file, debug)
+
+    algos = [algo] if isinstance(algo, str) else list(algo)
+
+    log.info("Running the optimization")
+    log.info("Problem: %s, Algorithms: %s, Runs number: %s, Saving the results: %s", problem, algos, runs_number, save_results)
+
+    if cf.ga["pop_size"] < cf.ga["test_suite_size"]:
+        log.error("Population size should be greater or equal to test suite size")
+        sys.exit(1)
 
-        res = minimize(
-            PROBLEMS[problem + "_" + algo](),
-            algorithm,
-            termination,
-            seed=seed,
-            verbose=True,
-            save_history=True,
-            eliminate_duplicates=True
-        )
+    if time_budget is not None or eval_budget is not None:
+        log.info("Time budget: %s sec, evaluation budget: %s", time_budget, eval_budget)
 
-        log.info("Execution time, %f sec", res.exec_time)
+    if workers > 1 and batch:
+        log.warning("The batch evaluation runs in the main process, ignoring --workers")
 
-        test_suite = get_test_suite(res, algo)
-        tc_stats["run" + str(m)] = get_stats(res, problem, algo)
-        tcs["run" + str(m)] = test_suite
+    seeds = get_run_seeds(random_seed, len(algos) * runs_number)
+    jobs = [
+        dict(problem=problem, algo=a, run=m, seed=seeds[i * runs_number + m], save_results=save_results,
+             batch=batch, time_budget=time_budget, eval_budget=eval_budget)
+        for i, a in enumerate(algos) for m in range(runs_number)
+    ]
 
-        tcs_convergence["run" + str(m)] = get_convergence(res, n_offsprings)
+    tc_stats = {a: {} for a in algos}
+    tcs = {a: {} for a in algos}
+    tcs_convergence = {a: {} for a in algos}
 
+    def collect(job, result):
+        a, key = job["algo"], "run" + str(job["run"])
+        tc_stats[a][key], tcs[a][key], tcs_convergence[a][key] = result
         if save_results:
-            save_tc_results(tc_stats, tcs, tcs_convergence, algo)
-            save_tcs_images(test_suite, problem, m, algo)
+            order = sorted(tc_stats[a], key=lambda k: int(k[3:]))
+            save_tc_results({k: tc_stats[a][k] for k in order}, {k: tcs[a][k] for k in order},
+                            {k: tcs_convergence[a][k] for k in order}, a)
+
+    start = time.time()
+    if parallel > 1:
+        log.info("Scheduling %d runs on %d processes", len(jobs), parallel)
+        with ProcessPoolExecutor(parallel) as executor:
+            futures = {
+                executor.submit(run_in_process, dict(cf.ga), dict(cf.vehicle_env), workers, cache, **job): job
+                for job in jobs
+            }
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+    else:
+        runner = None
+        if workers > 1 and not batch:
+            runner = ProcessPoolEvaluation(workers, cache)
+
+        fitness_cache = set_fitness_cache(cache)
+
+        for job in jobs:
+            collect(job, run_optimization(runner=runner, **job))
+
+        if runner is not None:
+            runner.close()
+        if fitness_cache is not None:
+            fitness_cache.close()
+
+    log.info("Total execution time of the %d runs, %f sec", len(jobs), time.time() - start)
 
 
 ################################## MAIN ########################################
 
 if __name__ == "__main__":
     args = parse_arguments()
-    main(args.problem, args.algorithm, args.runs, args.save_results, args.seed, args.debug)
+    if args.max_steps is not None:
+        cf.vehicle_env["max_steps"] = args.max_steps
+    if args.stop_deviation is not None:
+        cf.vehicle_env["stop_deviation"] = args.stop_deviation
+    main(args.problem, args.algorithm, args.runs, args.save_results, args.seed, args.debug, args.batch, args.workers, args.cache, args.time_budget, args.eval_budget, args.parallel)
 